@@ -0,0 +1,147 @@
+#! /usr/bin/env python3
+"""
+Run PinterestDownloader.download_board end to end against a fake pinterest site on a local port, and report pins/s,
+MB/s, the peak RSS and the CPU time. Runs offline. The default browser scraper needs Firefox and geckodriver,
+'--scraper resource' runs without a browser.
+
+Save a result with '--json result.json' and pass it as '--baseline' to a later run, to fail with exit code 1
+if the later run is slower by more than the tolerance.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_site import start_fake_site  # noqa: E402
+from pinterestDL.metrics import Metrics  # noqa: E402
+from pinterestDL.pinterest_downloader import ENGINES, SCRAPERS, PinterestDownloader  # noqa: E402
+from pinterestDL.postprocess import FORMATS, PostProcessor  # noqa: E402
+
+
+def parse_sizes(sizes):
+    """
+    :param sizes: Comma separated image sizes, e.g. '512x512,1024x768'.
+    :returns a list of (width, height) tuples.
+    """
+    return [tuple(int(side) for side in size.split("x")) for size in sizes.split(",")]
+
+
+def run(args):
+    """
+    Download the fake board once.
+    :returns the result dict of the run, and the report of its Metrics.
+    """
+    server, board_url = start_fake_site(num_pins=args.pins, sizes=parse_sizes(args.sizes), latency=args.latency,
+                                        failure_rate=args.failure_rate, truncate_rate=args.truncate_rate,
+                                        pins_per_load=args.pins_per_load, load_time=args.load_time,
+                                        noise=args.noise, max_rate=args.max_rate)
+    metrics = Metrics()
+    post_processor = None
+    if args.verify or args.convert or args.max_size or args.thumbnails:
+        post_processor = PostProcessor(convert=args.convert, max_size=args.max_size, thumbnail_size=args.thumbnails,
+                                       num_processes=args.processes)
+    downloader_kwargs = dict(page_timeout=args.timeout, num_threads=args.threads, engine=args.engine,
+                             scraper=args.scraper, metrics=metrics, retries=args.retries,
+                             post_processor=post_processor)
+    if args.min_resolution is not None:
+        downloader_kwargs.update(min_resolution=args.min_resolution, size_compare_mode="area")
+
+    result = {"scraper": args.scraper, "engine": args.engine, "threads": args.threads, "pins": args.pins,
+              "latency": args.latency, "failure_rate": args.failure_rate, "max_rate": args.max_rate}
+    cpu_before = os.times()
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as folder:
+        try:
+            with PinterestDownloader(**downloader_kwargs) as dl:
+                summary = dl.download_board(board_url, folder, num_pins=args.count)
+            result.update(downloaded=summary["downloaded"], skipped=summary["skipped"],
+                          filtered=summary["filtered"], failed=summary["failed"])
+        except Exception as e:
+            result["error"] = repr(e)
+        finally:
+            if post_processor is not None:
+                post_processor.shutdown()
+    seconds = time.perf_counter() - start
+    cpu_after = os.times()
+    server.shutdown()
+
+    report = metrics.report()
+    result.update(seconds=seconds,
+                  pins_per_second=report["counters"].get("pins_downloaded", 0) / seconds,
+                  megabytes_per_second=report["counters"].get("bytes_downloaded", 0) / 1e6 / seconds,
+                  cpu_seconds=(cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system),
+                  children_cpu_seconds=(cpu_after.children_user - cpu_before.children_user)
+                  + (cpu_after.children_system - cpu_before.children_system),
+                  # ru_maxrss is in kilobytes on Linux, children only count once they exited
+                  peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+                  children_peak_rss_mb=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1e3)
+    return result, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scraper", default="browser", choices=SCRAPERS, help="How the pins of the board are found.")
+    parser.add_argument("-e", "--engine", default="thread", choices=ENGINES, help="Download engine.")
+    parser.add_argument("-j", "--threads", default=8, type=int, help="Number of concurrent downloads.")
+    parser.add_argument("--pins", default=500, type=int, help="Pins on the board, 0 for an endless board.")
+    parser.add_argument("-c", "--count", default=None, type=int, help="Stop after downloading so many pins.")
+    parser.add_argument("--sizes", default="512x512", help="Comma separated sizes of the images, e.g. 512x512,200x100.")
+    parser.add_argument("--noise", default=False, action="store_true", help="Serve incompressible images.")
+    parser.add_argument("-r", "--min-resolution", default=None, help="Minimal resolution WIDTHxHEIGHT, by area.")
+    parser.add_argument("--latency", default=0.02, type=float, help="Seconds the site waits per request.")
+    parser.add_argument("--failure-rate", default=0.0, type=float, help="Fraction of image requests that fail.")
+    parser.add_argument("--truncate-rate", default=0.0, type=float,
+                        help="Fraction of image requests whose connection dies halfway.")
+    parser.add_argument("--max-rate", default=float("inf"), type=float,
+                        help="Image requests per second after which the site answers '429 Too Many Requests'.")
+    parser.add_argument("--retries", default=4, type=int, help="Retries of the downloader per image.")
+    parser.add_argument("--verify", default=False, action="store_true", help="Fully decode the downloaded images.")
+    parser.add_argument("--convert", default=None, choices=sorted(FORMATS), help="Convert the images to this format.")
+    parser.add_argument("--max-size", default=None, type=int, help="Downscale images to this many pixels.")
+    parser.add_argument("--thumbnails", default=None, type=int, help="Make thumbnails of this many pixels.")
+    parser.add_argument("--processes", default=None, type=int, help="Number of post-processing processes.")
+    parser.add_argument("--pins-per-load", default=50, type=int, help="Pins the board page adds per scroll.")
+    parser.add_argument("--load-time", default=0.2, type=float, help="Seconds the board page takes to add pins.")
+    parser.add_argument("-t", "--timeout", default=2, type=int, help="Page timeout of the downloader.")
+    parser.add_argument("--json", default=None, help="Write the result and all statistics to this file.")
+    parser.add_argument("--baseline", default=None, help="Result file of an earlier run to compare against.")
+    parser.add_argument("--tolerance", default=0.2, type=float,
+                        help="Allowed fraction of pins/s to lose against the baseline.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    result, report = run(args)
+    if "error" in result:
+        print(f"failed:          {result['error']}")
+    else:
+        print(f"downloaded:      {result['downloaded']} pins, skipped {result['skipped']}, "
+              f"filtered {result['filtered']}, failed {result['failed']}")
+    print(f"wall clock:      {result['seconds']:.2f}s")
+    print(f"throughput:      {result['pins_per_second']:.1f} pins/s, {result['megabytes_per_second']:.2f} MB/s")
+    print(f"cpu time:        {result['cpu_seconds']:.2f}s, {result['children_cpu_seconds']:.2f}s in child processes")
+    print(f"peak rss:        {result['peak_rss_mb']:.0f} MB, {result['children_peak_rss_mb']:.0f} MB "
+          f"in child processes")
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"result": result, "metrics": report}, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["result"]
+        ratio = result["pins_per_second"] / baseline["pins_per_second"]
+        print(f"against baseline: {ratio:.2f}x pins/s")
+        if ratio < 1 - args.tolerance:
+            print("Regression: slower than the baseline.")
+            sys.exit(1)
+    if "error" in result:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#! /usr/bin/env python3
+"""
+Compare the download throughput of the thread and the async engine against a local image server.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from image_server import make_image, start_image_server  # noqa: E402
+from pinterestDL.async_engine import AsyncDownloadPipeline  # noqa: E402
+from pinterestDL.pinterest_downloader import Downloader, _get_size_verifier  # noqa: E402
+from pinterestDL.pipeline import DownloadPipeline  # noqa: E402
+
+
+def run(pipeline_cls, image_host, num_images, **kwargs):
+    """
+    Download num_images distinct urls with the given pipeline.
+    :returns the elapsed seconds and the number of downloaded images.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        with Downloader(folder, _get_size_verifier(0, 0, None)) as downloader:
+            start = time.perf_counter()
+            with pipeline_cls(downloader, **kwargs) as pipeline:
+                for i in range(num_images):
+                    pipeline.submit(f"{image_host}/originals/{i}--pin{i}.png")
+            return time.perf_counter() - start, pipeline.num_downloaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", default=1000, type=int, help="Number of images to download.")
+    parser.add_argument("--size", default=512, type=int, help="Width and height of the served image.")
+    parser.add_argument("--latency", default=0.02, type=float, help="Seconds the image server waits per request.")
+    parser.add_argument("--threads", default=4, type=int, help="Number of threads of the thread engine.")
+    parser.add_argument("--concurrency", default=100, type=int, help="Concurrent downloads of the async engine.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    image = make_image(args.size, args.size)
+    server, image_host = start_image_server(image, latency=args.latency)
+    megabytes = args.images * len(image) / 1e6
+    runs = [("thread", DownloadPipeline, dict(num_workers=args.threads)),
+            ("async", AsyncDownloadPipeline, dict(num_workers=args.concurrency, per_host_limit=args.concurrency))]
+    for name, pipeline_cls, kwargs in runs:
+        elapsed, downloaded = run(pipeline_cls, image_host, args.images, **kwargs)
+        print(f"{name:>6}: {downloaded} images in {elapsed:.2f}s, "
+              f"{downloaded / elapsed:.1f} images/s, {megabytes / elapsed:.2f} MB/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#! /usr/bin/env python3
+"""
+Measure the cost of extracting image links per scroll round while a board grows, for both extraction modes.
+The browser is faked, so this measures the Python side: transferring and parsing the page in 'soup' mode
+against decoding the list of new links in 'script' mode.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_pipeline import FakeBrowser  # noqa: E402
+from pinterestDL.browser_scraper import BrowserScraper  # noqa: E402
+
+
+def measure(extraction, rounds, pins_per_scroll):
+    """
+    :returns the seconds each extraction took, one per scroll round.
+    """
+    scraper = BrowserScraper(extraction=extraction)
+    scraper.browser = FakeBrowser("https://i.pinimg.com", pins_per_scroll)
+    timings = []
+    for _ in range(rounds):
+        body = scraper.update_body_html()
+        start = time.perf_counter()
+        scraper.extract_pins(body)
+        timings.append(time.perf_counter() - start)
+        scraper.browser.num_loaded += pins_per_scroll
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", default=50, type=int, help="Number of scroll rounds.")
+    parser.add_argument("--pins-per-scroll", default=70, type=int, help="Pins that appear per scroll round.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    checkpoints = sorted({0, args.rounds // 4, args.rounds // 2, args.rounds - 1})
+    print("round  pins  " + "  ".join(f"{name:>10}" for name in ("script", "soup")))
+    results = [measure(extraction, args.rounds, args.pins_per_scroll) for extraction in ("script", "soup")]
+    for i in checkpoints:
+        print(f"{i + 1:5d} {(i + 1) * args.pins_per_scroll:5d}  "
+              + "  ".join(f"{timings[i] * 1000:8.2f}ms" for timings in results))
+
+
+if __name__ == "__main__":
+    main()
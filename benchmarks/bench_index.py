@@ -0,0 +1,48 @@
+#! /usr/bin/env python3
+"""
+Benchmark the dedup of already downloaded pins on a folder with many files: the previous os.listdir scan with
+a list lookup per pin, against the first and later runs with the persistent DownloadIndex.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pinterestDL.download_index import DownloadIndex  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", default=100000, type=int, help="Number of files in the download folder.")
+    parser.add_argument("--lookups", default=2000, type=int, help="Number of pins to look up.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(args.files):
+            open(os.path.join(folder, f"pin{i}.jpg"), "wb").close()
+        titles = [f"pin{i * (args.files // args.lookups)}.jpg" for i in range(args.lookups // 2)]
+        titles += [f"new{i}.jpg" for i in range(args.lookups // 2)]
+
+        start = time.perf_counter()
+        previously_downloaded = os.listdir(folder)
+        scanned = time.perf_counter()
+        found = sum(title in previously_downloaded for title in titles)
+        end = time.perf_counter()
+        print(f"os.listdir (before): scan {scanned - start:7.3f}s, {args.lookups} lookups {end - scanned:7.3f}s, "
+              f"found {found}")
+
+        for run in ("first run", "later run"):
+            start = time.perf_counter()
+            with DownloadIndex(folder) as index:
+                loaded = time.perf_counter()
+                found = sum(index.lookup(None, title) is not None for title in titles)
+                end = time.perf_counter()
+            print(f"{'index, ' + run:>19}: load {loaded - start:7.3f}s, {args.lookups} lookups {end - loaded:7.3f}s, "
+                  f"found {found}")
+
+
+if __name__ == "__main__":
+    main()
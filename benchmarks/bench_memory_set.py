@@ -0,0 +1,103 @@
+#! /usr/bin/env python3
+"""
+Micro-benchmark of MemorySet during a simulated crawl: every scroll round, the page returns the pins currently
+rendered, of which some are new. Compares the previous list based implementation with the current one.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pinterestDL.memory_set import MemorySet  # noqa: E402
+
+
+class ListMemorySet(list):
+    """
+    The list based MemorySet before it was backed by a hash index, kept for comparison.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.last_len = 0
+        super(ListMemorySet, self).__init__(*args, **kwargs)
+
+    def __iter__(self):
+        iterator = iter(self[self.last_len:])
+        self.last_len = len(self)
+        return iterator
+
+    def update(self, more_entries):
+        temp_entries = set(more_entries)
+        additions = [x for x in temp_entries if x not in self]
+        if len(additions) == 0:
+            return False
+        else:
+            self.extend(additions)
+            return True
+
+
+def _url(i):
+    return f"https://i.pinimg.com/originals/{i:08x}/{i}--pin{i}.jpg"
+
+
+def _pages(num_urls, new_per_scroll, rendered):
+    """
+    :returns the urls rendered on the page after each scroll round.
+    """
+    for end in range(new_per_scroll, num_urls + new_per_scroll, new_per_scroll):
+        yield [_url(i) for i in range(max(end - rendered, 0), end)]
+
+
+def crawl(memory_set_factory, num_urls, new_per_scroll, rendered):
+    """
+    Feed num_urls distinct urls into a set like download_board does.
+    The time is measured with all pages created up front, the memory in a second crawl that creates the urls while
+    crawling, so the memory they take is only retained if the set keeps them.
+    :returns the elapsed seconds and the peak memory allocated in MB.
+    """
+    pages = list(_pages(num_urls, new_per_scroll, rendered))
+    memory_set = memory_set_factory()
+    start = time.perf_counter()
+    for page in pages:
+        memory_set.update(page)
+        for _ in memory_set:
+            pass
+    elapsed = time.perf_counter() - start
+    del pages
+
+    memory_set = memory_set_factory()
+    tracemalloc.start()
+    for page in _pages(num_urls, new_per_scroll, rendered):
+        memory_set.update(page)
+        for _ in memory_set:
+            pass
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", default=100000, type=int, help="Number of distinct urls of the crawl.")
+    parser.add_argument("--new-per-scroll", default=50, type=int, help="New urls per scroll round.")
+    parser.add_argument("--rendered", default=200, type=int, help="Urls rendered on the page per scroll round.")
+    parser.add_argument("--legacy-urls", default=10000, type=int, help="Urls to run the list based set with.")
+    parser.add_argument("--bounded", default=10000, type=int, help="max_size of the bounded MemorySet.")
+    args = parser.parse_args()
+
+    # The list based set is quadratic, so it is only run on a part of the crawl and extrapolated
+    legacy_urls = min(args.urls, args.legacy_urls)
+    elapsed, peak = crawl(ListMemorySet, legacy_urls, args.new_per_scroll, args.rendered)
+    print(f"{'list (before)':>15}: {elapsed:8.3f}s, peak {peak:6.1f} MB for {legacy_urls} urls, "
+          f"~{elapsed * (args.urls / legacy_urls) ** 2:.0f}s extrapolated to {args.urls} urls")
+
+    runs = [("hash index", MemorySet),
+            (f"bounded {args.bounded}", lambda: MemorySet(max_size=args.bounded))]
+    for name, memory_set_factory in runs:
+        elapsed, peak = crawl(memory_set_factory, args.urls, args.new_per_scroll, args.rendered)
+        print(f"{name:>15}: {elapsed:8.3f}s, peak {peak:6.1f} MB for {args.urls} urls")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#! /usr/bin/env python3
+"""
+Benchmark how well scrolling and downloading overlap in PinterestDownloader.download_board.
+
+A fake browser serves a board that grows by a fixed number of pins on every scroll, and a local HTTP server
+serves the images with an artificial latency. No network access or real browser is needed.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from image_server import make_image, start_image_server  # noqa: E402
+from pinterestDL.browser_scraper import BrowserScraper  # noqa: E402
+from pinterestDL.pinterest_downloader import PinterestDownloader  # noqa: E402
+
+
+class FakeBody(object):
+
+    def __init__(self, images):
+        self.images = images
+
+    def get_attribute(self, name):
+        return "<body>" + "".join(f'<img src="{image["src"]}" srcset="{image["srcset"]}">'
+                                  for image in self.images) + "</body>"
+
+    def find_elements_by_tag_name(self, name):
+        return []
+
+
+class FakeBrowser(object):
+    """
+    Stand-in for a selenium webdriver showing an infinitely scrolling board.
+    New pins appear load_time seconds after scrolling to the bottom.
+    """
+
+    def __init__(self, image_host, pins_per_scroll, load_time=0.0):
+        self.image_host = image_host
+        self.pins_per_scroll = pins_per_scroll
+        self.load_time = load_time
+        self.get(None)
+
+    def get(self, url):
+        self.num_loaded = self.pins_per_scroll
+        self.num_extracted = 0
+        self.scrolled_at = None
+
+    def find_element_by_tag_name(self, name):
+        return FakeBody([self.image(i) for i in range(self.num_loaded)])
+
+    def image(self, i):
+        """
+        :returns the attributes of the img tag of the i-th pin, a thumbnail with the original in its srcset.
+        """
+        thumbnail = f"{self.image_host}/236x/{i}--pin{i}.png"
+        return {"src": thumbnail, "srcset": f"{thumbnail} 1x, {self.image_host}/originals/{i}--pin{i}.png 4x"}
+
+    def execute_script(self, script):
+        if "data-pindl-seen" in script:
+            images = [self.image(i) for i in range(self.num_extracted, self.num_loaded)]
+            self.num_extracted = self.num_loaded
+            return json.dumps({"images": images, "count": self.num_loaded})
+        if self.scrolled_at is None:
+            self.scrolled_at = time.perf_counter()
+        elif time.perf_counter() - self.scrolled_at >= self.load_time:
+            self.scrolled_at = None
+            self.num_loaded += self.pins_per_scroll
+        return [self.num_loaded, 100 * self.num_loaded]
+
+    def close(self):
+        pass
+
+
+class TimedBrowserScraper(BrowserScraper):
+    """
+    Scrapes the fake browser and measures the time spent scrolling.
+    """
+
+    def __init__(self, browser, **kwargs):
+        super(TimedBrowserScraper, self).__init__(**kwargs)
+        self._webdriver = lambda options: browser
+        self.scroll_time = 0.0
+
+    def scroll_down_for_new_body(self):
+        start = time.perf_counter()
+        body = super(TimedBrowserScraper, self).scroll_down_for_new_body()
+        self.scroll_time += time.perf_counter() - start
+        return body
+
+
+class BenchmarkDownloader(PinterestDownloader):
+
+    def __init__(self, browser, **kwargs):
+        super(BenchmarkDownloader, self).__init__(**kwargs)
+        self.browser_scraper = TimedBrowserScraper(browser, extraction=kwargs.get("extraction", "script"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pins", default=400, type=int, help="Number of pins to download.")
+    parser.add_argument("--pins-per-scroll", default=70, type=int, help="Pins that appear per scroll round.")
+    parser.add_argument("--latency", default=0.05, type=float, help="Seconds the image server waits per request.")
+    parser.add_argument("--load-time", default=0.25, type=float, help="Seconds until new pins load after a scroll.")
+    parser.add_argument("-j", "--threads", default=4, type=int, help="Number of download threads.")
+    parser.add_argument("-x", "--extraction", default="script", help="Extraction mode of the downloader.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    server, image_host = start_image_server(make_image(), latency=args.latency)
+    browser = FakeBrowser(image_host, args.pins_per_scroll, load_time=args.load_time)
+
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        with BenchmarkDownloader(browser, num_threads=args.threads, extraction=args.extraction) as dl:
+            dl.download_board("https://www.pinterest.com/user/bench/", folder, num_pins=args.pins)
+        wall_time = time.perf_counter() - start
+    server.shutdown()
+
+    download_time = args.pins * args.latency / args.threads
+    print(f"wall clock:            {wall_time:.2f}s")
+    print(f"scroll cadence:        {dl.browser_scraper.scroll_cadence:.2f}s")
+    print(f"scrolling:             {dl.browser_scraper.scroll_time:.2f}s")
+    print(f"downloading (ideal):   {download_time:.2f}s")
+    print(f"lock-step lower bound: {dl.browser_scraper.scroll_time + download_time:.2f}s")
+    print(f"overlap:               {(dl.browser_scraper.scroll_time + download_time) / wall_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
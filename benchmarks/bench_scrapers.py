@@ -0,0 +1,99 @@
+#! /usr/bin/env python3
+"""
+Measure the startup latency and memory of scraping a board without a browser.
+
+A local server replays the JSON feed of a board, either a synthetic one or a recording made with resource_server.py,
+and the images of a synthetic board are served by a local image server. With --browser, the startup of the headless
+Firefox used by the browser scraper is measured for comparison, which requires Firefox and geckodriver.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from image_server import make_image, start_image_server  # noqa: E402
+from resource_server import make_recording, start_resource_server  # noqa: E402
+from pinterestDL.browser_scraper import BrowserScraper  # noqa: E402
+from pinterestDL.pinterest_downloader import PinterestDownloader  # noqa: E402
+from pinterestDL.resource_scraper import ResourceScraper  # noqa: E402
+
+
+def scrape(board_url):
+    """
+    :returns the seconds until the first page of pins was found, the seconds to find all pins, the number of pins
+             and the peak of memory allocated while scraping.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ResourceScraper() as scraper:
+        scraper.load(board_url)
+        first_page = time.perf_counter() - start
+        num_pins = 0
+        while True:
+            pins, _ = scraper.find_pins()
+            num_pins += len(pins)
+            if scraper.exhausted:
+                break
+            scraper.load_more()
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_page, total, num_pins, peak
+
+
+def browser_startup():
+    """
+    :returns the seconds it takes to start and close the headless Firefox of the browser scraper.
+    """
+    start = time.perf_counter()
+    with BrowserScraper():
+        opened = time.perf_counter() - start
+    return opened
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pins", default=1000, type=int, help="Number of pins on the synthetic board.")
+    parser.add_argument("--latency", default=0.02, type=float, help="Seconds the servers wait per request.")
+    parser.add_argument("--recording", default=None, help="Replay this recording instead of a synthetic board.")
+    parser.add_argument("--browser", default=False, action="store_true", help="Also measure the Firefox startup.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    image_server, image_host = start_image_server(make_image(), latency=args.latency)
+    if args.recording is not None:
+        with open(args.recording) as f:
+            recording = json.load(f)
+    else:
+        recording = make_recording(image_host, args.pins)
+    resource_server, board_url = start_resource_server(recording, latency=args.latency)
+
+    first_page, total, num_pins, peak = scrape(board_url)
+    print(f"first page:            {first_page * 1000:.1f}ms")
+    print(f"all {num_pins} pins found:  {total:.2f}s")
+    print(f"peak scraper memory:   {peak / 1e6:.2f} MB")
+
+    if args.recording is None:
+        with tempfile.TemporaryDirectory() as folder:
+            start = time.perf_counter()
+            with PinterestDownloader(scraper="resource", num_threads=8) as dl:
+                summary = dl.download_board(board_url, folder)
+            wall_time = time.perf_counter() - start
+        print(f"downloaded {summary['downloaded']} pins: {wall_time:.2f}s ({summary['downloaded'] / wall_time:.0f} pins/s)")
+    print(f"peak RSS of the script: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:.0f} MB")
+
+    if args.browser:
+        print(f"Firefox startup:       {browser_startup():.2f}s")
+    resource_server.shutdown()
+    image_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
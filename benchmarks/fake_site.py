@@ -0,0 +1,176 @@
+"""
+Local fake of the parts of pinterest that PinterestDownloader talks to, so that download_board can be run end to end
+without network access:
+    /user/bench/               A board page that loads more pins with JS whenever it is scrolled to the bottom.
+                               The img tags are lazy loaded, they only get their source when they come into view.
+    /resource/.../get/         The JSON feed of the same board, for scraping without a browser.
+    /236x/... and /originals/  The thumbnail and the original image of every pin.
+The originals are generated once per configured size, served with a configurable latency,
+a configurable fraction of the requests fails, and requests beyond a configurable rate are throttled.
+"""
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from image_server import QuietServer, make_image
+from resource_server import ResourceHandler, make_recording
+
+_BOARD_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>bench</title><style>img {{ display: block; width: 236px; height: 236px; }}</style></head>
+<body>
+<h1>bench</h1>
+<span>{pin_count_text}</span>
+<div id="grid"></div>
+<script>
+var root = "{root}", total = {total}, pinsPerLoad = {pins_per_load}, loadTime = {load_time}, loaded = 0, loading = false;
+
+function lazyLoad() {{
+    var images = document.querySelectorAll("img[data-src]");
+    for (var i = 0; i < images.length; i++) {{
+        if (images[i].getBoundingClientRect().top < 2 * window.innerHeight) {{
+            images[i].setAttribute("srcset", images[i].getAttribute("data-srcset"));
+            images[i].setAttribute("src", images[i].getAttribute("data-src"));
+            images[i].removeAttribute("data-src");
+        }}
+    }}
+}}
+
+function loadPins() {{
+    var grid = document.getElementById("grid");
+    var end = Math.min(loaded + pinsPerLoad, total);
+    for (; loaded < end; loaded++) {{
+        var image = document.createElement("img");
+        var name = loaded + "--pin" + loaded + ".png";
+        image.setAttribute("data-src", root + "/236x/" + name);
+        image.setAttribute("data-srcset", root + "/236x/" + name + " 1x, " + root + "/originals/" + name + " 4x");
+        grid.appendChild(image);
+    }}
+    loading = false;
+    lazyLoad();
+}}
+
+window.addEventListener("scroll", function () {{
+    lazyLoad();
+    var atBottom = window.innerHeight + window.scrollY >= document.body.scrollHeight - 10;
+    if (atBottom && !loading && loaded < total) {{
+        loading = true;
+        setTimeout(loadPins, loadTime);
+    }}
+}});
+loadPins();
+</script>
+</body>
+</html>
+"""
+
+_IMAGE_PATH = re.compile(r"^/(originals|236x)/(\d+)--")
+
+
+class FakeSiteHandler(ResourceHandler):
+    """
+    Answers the board page, the resource endpoints and the images of the fake site.
+    """
+    page = b""
+    thumbnail = b""
+    originals = []
+    failure_rate = 0.0
+    truncate_rate = 0.0
+    max_rate = float("inf")
+    # Times of the image requests in the last second, shared by all handler threads
+    recent = deque()
+    recent_lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.startswith("/resource/"):
+            super(FakeSiteHandler, self).do_GET()
+        elif self.path.startswith("/user/bench"):
+            self._send(self.page, "text/html")
+        else:
+            self._send_image()
+
+    def _send_image(self):
+        time.sleep(self.latency)
+        match = _IMAGE_PATH.match(self.path)
+        if match is None:
+            self.send_error(404)
+            return
+        if self._too_many_requests():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        chance = random.random()
+        if chance < self.failure_rate:
+            self.send_error(503)
+            return
+        if match.group(1) == "236x":
+            image = self.thumbnail
+        else:
+            image = self.originals[int(match.group(2)) % len(self.originals)]
+        if chance < self.failure_rate + self.truncate_rate:
+            # The connection dies in the middle of the image
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(image)))
+            self.end_headers()
+            self.wfile.write(image[:len(image) // 2])
+            self.close_connection = True
+            return
+        self._send(image, "image/png")
+
+    def _too_many_requests(self):
+        """
+        :returns True, if there were more image requests in the last second than the maximal rate allows.
+        """
+        now = time.monotonic()
+        with self.recent_lock:
+            while self.recent and self.recent[0] < now - 1:
+                self.recent.popleft()
+            if len(self.recent) >= self.max_rate:
+                return True
+            self.recent.append(now)
+            return False
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fake_site(num_pins=1000, sizes=((512, 512),), latency=0.0, failure_rate=0.0, truncate_rate=0.0,
+                    pins_per_load=50, load_time=0.2, noise=False, max_rate=float("inf")):
+    """
+    Serve a fake board on a free local port in a background thread.
+    :param num_pins: The number of pins on the board. With 0, the board page loads pins endlessly and does not
+           show a pin count, like a tag page. The JSON feed always has a pin count.
+    :param sizes: The width and height of the original images. The i-th pin has the size at i modulo their number.
+    :param latency: Seconds to wait before answering a request for an image or a page of the feed.
+    :param failure_rate: Fraction of the image requests that are answered with '503 Service Unavailable'.
+    :param truncate_rate: Fraction of the image requests whose connection dies after half of the image.
+    :param pins_per_load: Number of pins the board page adds when it is scrolled to the bottom.
+    :param load_time: Seconds the board page takes to add pins after it was scrolled to the bottom.
+    :param noise: Fill the images with random pixels, so that their size is realistic for their resolution.
+    :param max_rate: Number of image requests per second after which further requests are answered with
+           '429 Too Many Requests'.
+    :returns the running server and the url of the board. Call shutdown() on the server to stop it.
+    """
+    handler = type("ConfiguredFakeSiteHandler", (FakeSiteHandler,), {
+        "latency": latency, "failure_rate": failure_rate, "truncate_rate": truncate_rate,
+        "max_rate": max_rate, "recent": deque(),
+        "thumbnail": make_image(236, 236),
+        "originals": [make_image(width, height, noise=noise) for width, height in sizes]})
+    server = QuietServer(("127.0.0.1", 0), handler)
+    root = f"http://127.0.0.1:{server.server_port}"
+
+    handler.recording = make_recording(root, num_pins if num_pins > 0 else 1000, sizes=sizes)
+    handler.page = _BOARD_PAGE.format(root=root, pin_count_text=f"{num_pins} Pins" if num_pins > 0 else "More ideas",
+                                      total=num_pins if num_pins > 0 else "Infinity",
+                                      pins_per_load=pins_per_load, load_time=int(load_time * 1000)).encode()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{root}/user/bench/"
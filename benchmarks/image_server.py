@@ -0,0 +1,69 @@
+"""
+Local HTTP server that serves synthetic images, used by the benchmarks instead of Pinterest's image CDN.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import os
+import threading
+import time
+
+from PIL import Image
+
+
+def make_image(width=64, height=64, image_format="PNG", noise=False):
+    """
+    :param noise: Fill the image with random pixels, so that it does not compress to a few bytes.
+    :returns the encoded bytes of an image of the given size.
+    """
+    if noise:
+        image = Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+    else:
+        image = Image.new("RGB", (width, height), color=(width % 256, height % 256, 128))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the same image for every path after sleeping for the configured latency.
+    Speaks HTTP/1.1, so clients can keep connections alive.
+    """
+    protocol_version = "HTTP/1.1"
+    image = b""
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(self.image)))
+        self.end_headers()
+        self.wfile.write(self.image)
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    """
+    Does not print a traceback for every download the client aborts on purpose.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def start_image_server(image, latency=0.0):
+    """
+    Serve an image on a free local port in a background thread.
+    :param image: The bytes to answer every request with.
+    :param latency: Seconds to wait before answering a request.
+    :returns the running server and its base url. Call shutdown() on the server to stop it.
+    """
+    handler = type("ConfiguredImageHandler", (ImageHandler,), {"image": image, "latency": latency})
+    server = QuietServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
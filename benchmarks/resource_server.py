@@ -0,0 +1,127 @@
+"""
+Local HTTP server that replays recorded answers of pinterest's JSON resource endpoints, used by the benchmarks
+to scrape boards without a browser and without network access.
+
+A recording is a JSON object with the "board" answer of the BoardResource endpoint and the list of "pages" answered
+by the BoardFeedResource endpoint, each being the "resource_response" of the request. The bookmark of each page
+is the cursor of the next one. Record a real board with
+    python resource_server.py --record https://www.pinterest.com/user/board/ board.json
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from image_server import QuietServer  # noqa: E402
+from pinterestDL.resource_scraper import END_BOOKMARK, ResourceScraper, parse_board_url  # noqa: E402
+
+
+def make_recording(image_host, num_pins, page_size=25, sizes=((64, 64),)):
+    """
+    :param image_host: The base url of the server that serves the images of the pins.
+    :param num_pins: The number of pins on the board.
+    :param page_size: The number of pins per page of the feed.
+    :param sizes: The width and height of the original images. The i-th pin has the size at i modulo their number.
+    :returns a synthetic recording of a board.
+    """
+    pages = []
+    for start in range(0, num_pins, page_size):
+        pins = [{"type": "pin", "id": str(i),
+                 "images": {"236x": {"url": f"{image_host}/236x/{i}--pin{i}.png", "width": 236, "height": 236},
+                            "orig": {"url": f"{image_host}/originals/{i}--pin{i}.png",
+                                     "width": sizes[i % len(sizes)][0], "height": sizes[i % len(sizes)][1]}}}
+                for i in range(start, min(start + page_size, num_pins))]
+        # Feeds contain entries that are no pins, e.g. stories
+        pins.append({"type": "story", "id": f"story{start}"})
+        pages.append({"data": pins, "bookmark": f"page{len(pages) + 1}"})
+    if pages:
+        pages[-1]["bookmark"] = END_BOOKMARK
+    return {"board": {"data": {"id": "1", "name": "bench", "pin_count": num_pins}}, "pages": pages}
+
+
+def record_board(board_url, page_size=25):
+    """
+    Record a real board by paging through its feed.
+    :param board_url: The url of the pinterest board.
+    :param page_size: The number of pins to request per page.
+    :returns the recording.
+    """
+    scraper = ResourceScraper(page_size=page_size)
+    root, path, username, slug, _ = parse_board_url(board_url)
+    board = scraper._get(root, path, "BoardResource", {"username": username, "slug": slug})
+    pages = []
+    bookmark = None
+    while bookmark != END_BOOKMARK:
+        options = {"board_id": board["data"]["id"], "page_size": page_size}
+        if bookmark is not None:
+            options["bookmarks"] = [bookmark]
+        pages.append(scraper._get(root, path, "BoardFeedResource", options))
+        bookmark = pages[-1].get("bookmark", END_BOOKMARK)
+    return {"board": board, "pages": pages}
+
+
+class ResourceHandler(BaseHTTPRequestHandler):
+    """
+    Answers requests to the resource endpoints from a recording, picking the page of the feed by its bookmark.
+    """
+    protocol_version = "HTTP/1.1"
+    recording = {}
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urllib.parse.urlsplit(self.path)
+        options = json.loads(urllib.parse.parse_qs(url.query)["data"][0])["options"]
+        if url.path.startswith("/resource/BoardResource/"):
+            answer = self.recording["board"]
+        else:
+            bookmarks = options.get("bookmarks") or [None]
+            pages = self.recording["pages"]
+            cursors = [None] + [page["bookmark"] for page in pages]
+            answer = pages[cursors.index(bookmarks[0])] if bookmarks[0] in cursors[:-1] else None
+
+        if answer is None:
+            self.send_error(404)
+            return
+        body = json.dumps({"resource_response": answer}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_resource_server(recording, latency=0.0):
+    """
+    Replay a recording on a free local port in a background thread.
+    :param recording: The recording to answer requests from.
+    :param latency: Seconds to wait before answering a request.
+    :returns the running server and the url of the recorded board on it. Call shutdown() on the server to stop it.
+    """
+    handler = type("ConfiguredResourceHandler", (ResourceHandler,), {"recording": recording, "latency": latency})
+    server = QuietServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/user/bench/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", nargs=2, metavar=("BOARD_URL", "FILE"), required=True,
+                        help="Record the feed of a board into a file.")
+    args = parser.parse_args()
+    board_url, path = args.record
+    with open(path, "w") as f:
+        json.dump(record_board(board_url), f)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,12 @@ import sys
 import argparse
 import logging
 
-from pinterestDL.pinterest_downloader import PinterestDownloader
+from pinterestDL.batch import download_boards, log_summaries, read_board_urls
+from pinterestDL.content_store import ContentStore
+from pinterestDL.metrics import Metrics
+from pinterestDL.pinterest_downloader import ENGINES, EXTRACTIONS, SCRAPERS, PinterestDownloader
+from pinterestDL.postprocess import FORMATS, PostProcessor
+from pinterestDL.retry import HostRateLimiter
 
 
 if sys.version_info < (3, 6):
@@ -20,7 +25,7 @@ def handle_sig_int(signal, frame):
     :param frame: The stack frame in which the signal was received.
     :return None.
     """
-    logging.warning("Aborted, download may be incomplete.")
+    logging.warning("Aborted, download may be incomplete. Continue it with '--resume'.")
     sys.exit(0)
 
 
@@ -34,7 +39,8 @@ def parse_cmd():
     parser = argparse.ArgumentParser(description="""Download a pinterest board or tag page. When downloading a tag page,
     and no maximal number of downloads is provided, stop the script with CTRL+C.""")
     # Required arguments
-    parser.add_argument(dest="link", help="Link to the pinterest page you want to download.")
+    parser.add_argument(dest="link", help="""Link to the pinterest page you want to download.
+                        With '--batch', a file with one link per line instead, or '-' to read the links from stdin.""")
     parser.add_argument(dest="dest_folder",
                         help="""Folder into which the board will be downloaded.
                          Folder with board name is automatically created or found inside this folder, if it already exists.
@@ -64,9 +70,80 @@ def parse_cmd():
                             because the page is not scraped exactly in the same order as the pins are added.""")
     parser.add_argument("-t", "--timeout", default=15, type=int, required=False, dest="timeout",
                         help="Set the timeout in seconds after which loading a pinterest board will be aborted, if unsuccessfull. Defaults to 15 seconds.")
+    parser.add_argument("-q", "--queue-size", default=256, type=int, required=False, dest="queue_size",
+                        help="""Maximal number of found pins that wait for a download thread. Scrolling pauses while the queue is full.
+                        Defaults to 256.""")
+    parser.add_argument("-e", "--engine", default="thread", required=False, choices=ENGINES, dest="engine",
+                        help="""Pick how images are downloaded:
+                             'thread': Each of the '-j' threads downloads one image at a time over a new connection.
+                             'async': Download '-j' images at the same time on a single thread, reusing connections to
+                             the same host. Use a high number of downloads like '-j 100'. Requires aiohttp.""")
+    parser.add_argument("-p", "--per-host", default=32, type=int, required=False, dest="per_host_limit",
+                        help="Maximal number of connections to a single host with the async engine. Defaults to 32.")
+    parser.add_argument("--retries", default=4, type=int, required=False, dest="retries",
+                        help="""Number of times a download that failed for a temporary reason, like a timeout or an overloaded server,
+                        is tried again, waiting longer every time. Downloads that still fail are tried once more at the end. Defaults to 4.""")
+    parser.add_argument("--request-timeout", default=30, type=float, required=False, dest="request_timeout",
+                        metavar="SECONDS",
+                        help="Time to wait for the connection to an image host and for every read from it. Defaults to 30 seconds.")
+    parser.add_argument("--rate", default=float("inf"), type=float, required=False, dest="rate",
+                        help="""Maximal number of image requests per second to a single host. Defaults to no limit,
+                        but the rate to a host is lowered automatically whenever it answers that there were too many requests.""")
+    parser.add_argument("--verify", default=False, action="store_true", dest="verify", required=False,
+                        help="""Decode every downloaded image completely in a separate process, and delete the ones that are truncated or corrupt,
+                        so that they are downloaded again by the next run. Implied by '--convert', '--max-size' and '--thumbnails'.""")
+    parser.add_argument("--convert", default=None, required=False, choices=sorted(FORMATS), dest="convert",
+                        help="Convert the downloaded images to this format. Animated images are kept as they are.")
+    parser.add_argument("--max-size", default=None, type=int, required=False, dest="max_size", metavar="PIXELS",
+                        help="Downscale downloaded images whose longer side is longer than this many pixels.")
+    parser.add_argument("--thumbnails", default=None, type=int, required=False, dest="thumbnail_size", metavar="PIXELS",
+                        help="Write a JPEG thumbnail of every downloaded image, with this many pixels on its longer side, into a 'thumbnails' folder.")
+    parser.add_argument("--processes", default=None, type=int, required=False, dest="num_processes",
+                        help="Number of processes that post-process images. Defaults to the number of cores.")
+    parser.add_argument("--url-memory", default=None, type=int, required=False, dest="url_memory",
+                        help="""Number of found pin links to remember, so they are not downloaded again when they reappear.
+                        Defaults to remembering all links. Set this on tag pages that are downloaded for a long time
+                        to keep the memory usage bounded, e.g. to 100000.""")
+    parser.add_argument("-x", "--extraction", default="script", required=False, choices=EXTRACTIONS,
+                        dest="extraction",
+                        help="""Pick how links to images are extracted from the page:
+                             'script': A script in the browser returns only the images added since the last scroll.
+                             'soup': The whole page is transferred and parsed after every scroll. Slower on big boards,
+                             but does not rely on running scripts in the page. Defaults to 'script'.""")
+    parser.add_argument("--scraper", default="browser", required=False, choices=SCRAPERS, dest="scraper",
+                        help="""Pick how the pins of a page are found:
+                             'browser': Scroll the page in a headless Firefox.
+                             'resource': Page through the feeds that the pinterest website loads its pins from,
+                             without starting a browser. Much faster to start and uses far less memory.
+                             Pages that can not be scraped this way fall back to the browser. Defaults to 'browser'.""")
+    parser.add_argument("-b", "--batch", default=False, action="store_true", dest="batch", required=False,
+                        help="""Download all pages listed in the file given as 'link'. The '-n' option is ignored,
+                        '-c' and '-s' apply to each page and '-j' is the limit of downloads over all pages.""")
+    parser.add_argument("--browsers", default=1, type=int, required=False, dest="num_browsers",
+                        help="Number of browsers that scrape pages at the same time with '--batch'. Defaults to 1.")
+    parser.add_argument("--store", default=None, required=False, dest="store_folder",
+                        help="""Keep a single copy of every image in this folder and only put hardlinks into the download folders.
+                        Images that are already in the store, e.g. from another board, are linked without downloading them again.
+                        Should be on the same file system as the download folders, otherwise the images are copied.""")
+    parser.add_argument("--resume", default=False, action="store_true", dest="resume", required=False,
+                        help="""Continue an interrupted download from the checkpoint in its download folder.
+                        Pins that were found before are not processed again, except for the ones that were not downloaded yet.""")
+    parser.add_argument("--sync", default=False, action="store_true", dest="sync", required=False,
+                        help="""Only download the pins that were added to the page since the last download with '--sync',
+                        and stop scrolling as soon as the pins of that download are reached. The pins of the page are kept
+                        in '.pinterest-dl-manifest.json' in the download folder.""")
+    parser.add_argument("--stats", default=None, required=False, dest="stats_file",
+                        help="""Write statistics of the run to this file as JSON: the time spent loading pages, scrolling,
+                        extracting pins, waiting in the queue, downloading, verifying and writing images,
+                        with histograms of the request latencies, and the number of pins and bytes downloaded.""")
+    parser.add_argument("--progress", default=None, type=float, required=False, dest="progress_interval",
+                        metavar="SECONDS",
+                        help="Log the number of pins and megabytes downloaded per second every so many seconds.")
     parser.add_argument("-v", "--verbose", default=False, action="store_true", dest="verbose", required=False,
                         help="Display more detailed output and progress reports.")
     args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error("--rate must be a positive number of requests per second.")
 
     return args
 
@@ -79,10 +156,50 @@ if __name__ == "__main__":
         log_level = logging.DEBUG
     logging.basicConfig(level=log_level, format='[%(asctime)s] %(levelname)s: %(message)s', datefmt='%I:%M:%S')
 
-    with PinterestDownloader(page_timeout=arguments.timeout,
+    downloader_kwargs = dict(page_timeout=arguments.timeout,
                              num_threads=arguments.nr_threads,
                              min_resolution=arguments.min_resolution,
-                             size_compare_mode=arguments.mode) as dl:
-        dl.download_board(board_url=arguments.link, download_folder=arguments.dest_folder,
-                          num_pins=arguments.num_pins, board_name=arguments.board_name,
-                          skip_tolerance=arguments.skip_limit)
+                             size_compare_mode=arguments.mode,
+                             queue_size=arguments.queue_size,
+                             engine=arguments.engine,
+                             per_host_limit=arguments.per_host_limit,
+                             url_memory=arguments.url_memory,
+                             extraction=arguments.extraction,
+                             scraper=arguments.scraper,
+                             metrics=Metrics(),
+                             retries=arguments.retries,
+                             request_timeout=arguments.request_timeout,
+                             rate_limiter=HostRateLimiter(rate=arguments.rate, min_rate=min(1.0, arguments.rate)),
+                             content_store=ContentStore(arguments.store_folder) if arguments.store_folder else None)
+
+    if arguments.verify or arguments.convert or arguments.max_size or arguments.thumbnail_size:
+        downloader_kwargs["post_processor"] = PostProcessor(convert=arguments.convert, max_size=arguments.max_size,
+                                                            thumbnail_size=arguments.thumbnail_size,
+                                                            num_processes=arguments.num_processes)
+
+    metrics = downloader_kwargs["metrics"]
+    if arguments.progress_interval:
+        metrics.start_reporting(arguments.progress_interval)
+    try:
+        if arguments.batch:
+            summaries = download_boards(board_urls=read_board_urls(arguments.link),
+                                        download_folder=arguments.dest_folder,
+                                        num_browsers=arguments.num_browsers, num_pins=arguments.num_pins,
+                                        skip_tolerance=arguments.skip_limit, resume=arguments.resume,
+                                        sync=arguments.sync,
+                                        **downloader_kwargs)
+            log_summaries(summaries)
+        else:
+            with PinterestDownloader(**downloader_kwargs) as dl:
+                dl.download_board(board_url=arguments.link, download_folder=arguments.dest_folder,
+                                  num_pins=arguments.num_pins, board_name=arguments.board_name,
+                                  skip_tolerance=arguments.skip_limit, resume=arguments.resume,
+                                  sync=arguments.sync)
+    finally:
+        if downloader_kwargs.get("post_processor") is not None:
+            downloader_kwargs["post_processor"].shutdown()
+        if downloader_kwargs["content_store"] is not None:
+            downloader_kwargs["content_store"].close()
+        metrics.stop_reporting()
+        if arguments.stats_file:
+            metrics.write_report(arguments.stats_file)
@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+import logging
+import threading
+from time import perf_counter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from pinterestDL.image_probe import CHUNK_SIZE, SizeProbe
+from pinterestDL.pipeline import DownloadPipeline
+from pinterestDL.retry import RETRY_STATUSES, DownloadError, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDownloadExecutor(object):
+
+    def __init__(self, max_connections=100, per_host_limit=32, timeout=30):
+        """
+        Runs coroutines on an event loop in a background thread, with an HTTP session whose connections are
+        kept alive and reused for further images from the same host.
+        Use it like a ThreadPoolExecutor, it can be shared by several AsyncDownloadPipelines.
+        Requires the optional dependency aiohttp.
+
+        :param max_connections: Number of images to download at the same time over all hosts.
+        :param per_host_limit: Number of connections to open to a single host at the same time.
+        :param timeout: Time in seconds to wait for a connection to a host, and for every read from it.
+        """
+        if aiohttp is None:
+            raise RuntimeError("The async download engine requires aiohttp. Install it with 'pip3 install aiohttp'.")
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="pin-download-loop", daemon=True)
+        self._loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self._open_session(), self.loop).result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    async def _open_session(self):
+        """
+        The session must be created inside the event loop that uses it.
+        """
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_limit)
+        # No total timeout, large images on slow connections may take long as long as data keeps arriving
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, raise_for_status=True)
+
+    def submit(self, coroutine_function, *args):
+        """
+        Schedule a coroutine on the event loop.
+        :returns a concurrent.futures.Future of its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine_function(*args), self.loop)
+
+    def shutdown(self):
+        """
+        Close all connections and stop the event loop.
+        """
+        asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join()
+        self.loop.close()
+
+
+class AsyncDownloadPipeline(DownloadPipeline):
+
+    def __init__(self, downloader, num_workers=100, per_host_limit=32, timeout=30, executor=None, **kwargs):
+        """
+        Download pipeline that runs all downloads as coroutines on a single event loop.
+        Connections are kept alive and reused for further images from the same host,
+        which saves a TCP and TLS handshake for nearly every pin.
+        Looking up, writing and verifying the images happens in the default executor of the loop.
+
+        :param downloader: The Downloader whose present-check and store steps are used.
+        :param num_workers: Number of images to download at the same time over all hosts.
+        :param per_host_limit: Number of connections to open to a single host at the same time.
+        :param timeout: Time in seconds to wait for a connection to a host, and for every read from it.
+        :param executor: An AsyncDownloadExecutor to download with. If not given, the pipeline creates and owns one.
+        :param kwargs: Further arguments of DownloadPipeline. The listener is called in the default executor of the
+               loop, not on the loop itself.
+        """
+        super(AsyncDownloadPipeline, self).__init__(downloader, num_workers=num_workers, executor=executor, **kwargs)
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+
+    def __enter__(self):
+        """
+        Start the event loop and open the connection pool, unless a shared executor was given.
+        """
+        if self._owns_executor:
+            self._executor = self.make_executor(self.num_workers, self.per_host_limit, self.timeout)
+        return self
+
+    @staticmethod
+    def make_executor(num_workers, per_host_limit=32, timeout=30):
+        """
+        :returns an executor that can be shared by several pipelines of this type.
+        """
+        return AsyncDownloadExecutor(max_connections=num_workers, per_host_limit=per_host_limit, timeout=timeout)
+
+    async def _download(self, url):
+        """
+        Download a single image and account for it in the pipeline.
+        """
+        if self.done:
+            self._finish(url)
+            return
+        self._observe_queue_wait(url)
+        try:
+            download_report = await self._download_high_res(url)
+        except Exception as e:
+            self._finish(url, error=e)
+        else:
+            if self.listener is not None:
+                # A slow listener would stall all downloads on the event loop
+                await self._executor.loop.run_in_executor(None, self._notify, url, download_report)
+            self._finish(url, download_report=download_report)
+
+    async def _download_high_res(self, high_res_source):
+        """
+        Coroutine version of Downloader.download_high_res.
+        :param high_res_source: The source URL of the image to download.
+        :returns the status report on how the download went.
+        :raises DownloadError: if the request still failed after all retries.
+        """
+        loop = self._executor.loop
+        # Linking known images and writing the index touch the disk, which must not block the other downloads
+        title, status_report = await loop.run_in_executor(None, self.downloader.check_known, high_res_source)
+        if status_report is not None:
+            return status_report
+
+        for attempt in itertools.count():
+            await self._wait_for_host(high_res_source)
+            status, retry_after = None, None
+            try:
+                data, status_report = await self._request(high_res_source, title)
+                break
+            except aiohttp.ClientResponseError as e:
+                if e.status not in RETRY_STATUSES:
+                    logger.warning(f"Could not download Pin {title}: {e}")
+                    return {"downloaded": False, "reason": "err_http", "title": title}
+                error, status = e, e.status
+                retry_after = parse_retry_after(e.headers.get("Retry-After") if e.headers is not None else None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Also refused or reset connections and connections that died mid-image
+                error = e
+            delay = self.downloader.retry_delay(high_res_source, attempt, error, status=status,
+                                                retry_after=retry_after)
+            if delay is None:
+                raise DownloadError(high_res_source, error) from error
+            await asyncio.sleep(delay)
+
+        self.downloader.rate_limiter.succeeded(high_res_source)
+        if status_report is not None:
+            return status_report
+        return await loop.run_in_executor(None, self.downloader.store, high_res_source, title, data)
+
+    async def _wait_for_host(self, high_res_source):
+        """
+        Coroutine version of Downloader.wait_for_host.
+        """
+        start = perf_counter()
+        wait = self.downloader.rate_limiter.acquire(high_res_source)
+        if wait > 0:
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self.downloader.rate_limiter.acquire(high_res_source)
+            self.metrics.observe("rate_limit_wait", perf_counter() - start)
+
+    async def _request(self, high_res_source, title):
+        """
+        Coroutine version of Downloader._request.
+        :returns the bytes of the image and None, or None and the status report if the download was aborted.
+        """
+        start = perf_counter()
+        # Download the image, but abort as soon as its header shows that it is too small
+        async with self._executor.session.get(high_res_source) as response:
+            probe = SizeProbe(self.downloader.verify_size, content_length=response.content_length)
+            chunks = []
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                chunks.append(chunk)
+                if not probe.feed(chunk):
+                    self.metrics.observe("request", perf_counter() - start)
+                    return None, await self._executor.loop.run_in_executor(None, self.downloader.reject_early,
+                                                                           high_res_source, title, probe)
+            data = b"".join(chunks)
+        self.metrics.observe("request", perf_counter() - start)
+        self.metrics.add("bytes_downloaded", len(data))
+        return data, None
@@ -0,0 +1,106 @@
+import logging
+import queue
+import sys
+import threading
+
+from pinterestDL.pinterest_downloader import PinterestDownloader
+
+logger = logging.getLogger(__name__)
+
+
+def read_board_urls(source):
+    """
+    :param source: Path to a file with one link to a pinterest page per line, or '-' to read the links from stdin.
+                   Empty lines and lines starting with '#' are ignored.
+    :returns the list of links.
+    """
+    if source == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(source) as f:
+            lines = f.readlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def download_boards(board_urls, download_folder, num_browsers=1, num_pins=None,
+                    skip_tolerance=float("inf"), resume=False, sync=False, **downloader_kwargs):
+    """
+    Download many pinterest pages with a pool of browsers. Each browser scrapes one board after the other,
+    so the browser startup is only paid once per browser. All boards share one download executor,
+    so num_threads of the PinterestDownloader is the global limit of concurrent downloads.
+    If interrupted, the boards in progress are stopped and save their checkpoints before the exception is re-raised.
+
+    :param board_urls: The urls of the pinterest boards or tag pages.
+    :param download_folder: The folder in which a folder per board is created.
+    :param num_browsers: Number of browser instances that scrape boards at the same time.
+    :param num_pins: The number of pins to download per board, see PinterestDownloader.download_board.
+    :param skip_tolerance: The skip tolerance per board, see PinterestDownloader.download_board.
+    :param resume: Continue each board from its checkpoint, see PinterestDownloader.download_board.
+    :param sync: Only download the pins added to each board since its last sync, see PinterestDownloader.download_board.
+    :param downloader_kwargs: Arguments for each PinterestDownloader.
+    :returns a list with the summary of each board, in the order of board_urls.
+             Boards that failed have a summary with the "board_url" and the "error" instead.
+    """
+    boards = queue.Queue()
+    for i, board_url in enumerate(board_urls):
+        boards.put((i, board_url))
+    summaries = [None] * len(board_urls)
+    stop = threading.Event()
+
+    def scrape_boards(finished):
+        try:
+            with PinterestDownloader(**downloader_kwargs) as dl:
+                while not stop.is_set():
+                    try:
+                        i, board_url = boards.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        summaries[i] = dl.download_board(board_url=board_url, download_folder=download_folder,
+                                                         num_pins=num_pins, skip_tolerance=skip_tolerance,
+                                                         executor=executor, resume=resume, sync=sync, stop=stop)
+                    except Exception as e:
+                        logger.error(f"Download of {board_url} failed: {e}")
+                        summaries[i] = {"board_url": board_url, "error": str(e)}
+        finally:
+            finished.set()
+
+    with PinterestDownloader(**downloader_kwargs).make_executor() as executor:
+        # Waiting for events instead of joining the threads, because a join that is interrupted by CTRL+C
+        # may consider the thread stopped while it is still running
+        finished = [threading.Event() for _ in range(min(num_browsers, len(board_urls)))]
+        for i, browser_finished in enumerate(finished):
+            threading.Thread(target=scrape_boards, args=(browser_finished,), name=f"pin-browser-{i}",
+                             daemon=True).start()
+        try:
+            for browser_finished in finished:
+                browser_finished.wait()
+        finally:
+            # If interrupted, stop the boards in progress and let them save their checkpoints before the
+            # executor is shut down under them
+            stop.set()
+            for browser_finished in finished:
+                browser_finished.wait()
+
+    # Boards are left over if all browsers failed to start
+    return [summary if summary is not None else {"board_url": board_url, "error": "no browser could be started"}
+            for summary, board_url in zip(summaries, board_urls)]
+
+
+def log_summaries(summaries):
+    """
+    Log one line per downloaded board and the totals over all boards.
+    :param summaries: The board summaries returned by download_boards.
+    :returns None.
+    """
+    logger.info("Summary:")
+    for summary in summaries:
+        if "error" in summary:
+            logger.info(f"  {summary['board_url']}: failed, {summary['error']}")
+        else:
+            logger.info(f"  {summary['board_name']}: downloaded {summary['downloaded']}, "
+                        f"skipped {summary['skipped']}, failed {summary['failed']}, "
+                        f"saved {summary['bytes_saved'] / 1e6:.1f} MB")
+    succeeded = [summary for summary in summaries if "error" not in summary]
+    logger.info(f"Downloaded {sum(summary['downloaded'] for summary in succeeded)} pins from {len(succeeded)} boards, "
+                f"{len(summaries) - len(succeeded)} boards failed.")
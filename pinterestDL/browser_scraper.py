@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+from time import perf_counter, sleep
+
+from bs4 import BeautifulSoup
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.options import Options
+
+from pinterestDL.scraper import Scraper, make_pin, parse_srcset
+
+logger = logging.getLogger(__name__)
+
+EXTRACTIONS = ["script", "soup"]
+
+
+def find_num_pins(body):
+    """
+    :param body: the HTML body of a pinterest page.
+    :returns the number of pins in the pinterest board, or infinity if a tag page was given.
+    """
+
+    spans = body.find_elements_by_tag_name("span")
+    num_elements = float("inf")  # If we download from a tag page, return as many as possible
+    for i, span in enumerate(spans):
+        if "Pins" in span.text:
+            num_elements = int(span.text.split(" ")[0])
+            break
+
+    logger.debug(f"Found the provided page to contain {num_elements} pins.")
+    return num_elements
+
+
+def pin_from_img(src, srcset=None):
+    """
+    :param src: The source of an img tag of a pin, usually a small thumbnail.
+    :param srcset: The srcset of the img tag, which lists the bigger variants of the image up to the original.
+    :returns the pin record of the image. Its dimensions are not known from the page.
+    """
+    return make_pin([{"url": url, "width": None, "height": None} for url in [src] + parse_srcset(srcset)])
+
+
+def find_high_res_links(body):
+    """
+    :param body: The body of a pinterest html page.
+    :returns a list of records of the pins in the body element, and the number of images in it.
+    """
+    soup = BeautifulSoup(body.get_attribute("outerHTML"), "html.parser")
+    low_res_imgs = soup.find_all("img")
+    return [pin_from_img(img["src"], img.get("srcset")) for img in low_res_imgs], len(low_res_imgs)
+
+
+# Marks every image with the sources that were returned, so that each call only transfers the images added or changed
+# since the last one. Comparing the sources also reports images whose srcset arrived after their src, and img nodes
+# that a virtualized grid reused for another pin.
+_NEW_IMAGES_JS = """
+var images = document.querySelectorAll("img[src]");
+var found = [];
+for (var i = 0; i < images.length; i++) {
+    var source = images[i].getAttribute("src");
+    var sourceSet = images[i].getAttribute("srcset");
+    var seen = source + "|" + (sourceSet || "");
+    // Lazy loaded images may not have a source yet, they are picked up by a later call
+    if (source && images[i].getAttribute("data-pindl-seen") !== seen) {
+        images[i].setAttribute("data-pindl-seen", seen);
+        found.push({"src": source, "srcset": sourceSet});
+    }
+}
+return JSON.stringify({"images": found, "count": document.images.length});
+"""
+
+
+# Scroll to the bottom and report the number of images and the height of the page, to notice when new pins loaded
+_SCROLL_JS = """
+window.scrollTo(0, document.body.scrollHeight);
+return [document.images.length, document.body.scrollHeight];
+"""
+
+
+def find_new_high_res_links(browser):
+    """
+    Extract the image sources added to the page since the last call, without transferring the whole page.
+    :param browser: The selenium instance that shows the pinterest page.
+    :returns a list of records of the new pins, and the number of images on the page.
+    """
+    found = json.loads(browser.execute_script(_NEW_IMAGES_JS))
+    return [pin_from_img(image["src"], image["srcset"]) for image in found["images"]], found["count"]
+
+
+class BrowserScraper(Scraper):
+
+    def __init__(self, page_timeout=10, extraction="script", scroll_timeout=None,
+                 scroll_min_wait=0.05, scroll_max_wait=1.0):
+        """
+        Scrapes pinterest pages in a headless Firefox, scrolling down to make pinterest load more pins.
+
+        :param page_timeout: Time in seconds to wait for new pins after scrolling, before the page is assumed
+               to be finished.
+        :param extraction: How image links are extracted from the page. One of 'script' (only the images added since
+               the last scroll are returned by a script in the browser) or 'soup' (the whole page is parsed
+               with BeautifulSoup every time). 'script' falls back to 'soup' if the script fails.
+        :param scroll_timeout: Time in seconds to wait for new pins after scrolling. Defaults to the page_timeout.
+        :param scroll_min_wait: Shortest time in seconds to wait before checking for new pins after scrolling.
+        :param scroll_max_wait: Longest time in seconds to wait in between checks for new pins after scrolling.
+        """
+        super(BrowserScraper, self).__init__()
+        if extraction not in EXTRACTIONS:
+            raise ValueError(f"Unknown extraction mode '{extraction}', choose one of {EXTRACTIONS}.")
+        self.browser = None
+        self.extraction = extraction
+        self.scroll_timeout = page_timeout if scroll_timeout is None else scroll_timeout
+        self.scroll_min_wait = scroll_min_wait
+        self.scroll_max_wait = scroll_max_wait
+        # Learned time pinterest takes to load new pins after a scroll
+        self.scroll_cadence = scroll_min_wait
+        # Whether the last scroll loaded new content
+        self.page_grew = True
+        self.body = None
+        self._webdriver = webdriver.Firefox
+
+    def open(self):
+        """
+        Open a selenium instance.
+        """
+        options = Options()
+        options.add_argument("--headless")
+        self.browser = self._webdriver(options=options)
+
+    def close(self):
+        """
+        Close the selenium instance.
+        """
+        self.browser.close()
+        if os.path.isfile("geckodriver.log"):
+            logger.debug("Removing geckodriver.log")
+            os.remove("geckodriver.log")
+
+    @property
+    def exhausted(self):
+        return not self.page_grew
+
+    def load(self, board_url):
+        self.browser.get(board_url)
+        self.page_grew = True
+        self.body = self.update_body_html()
+        return find_num_pins(self.body)
+
+    def find_pins(self):
+        return self.extract_pins(self.body)
+
+    def load_more(self):
+        self.body = self.scroll_down_for_new_body()
+
+    def extract_pins(self, body):
+        """
+        Extract the pins from the page with the chosen extraction mode.
+        :param body: The body of the current HTML page, only parsed in 'soup' mode.
+        :returns a list of pin records, and the number of images on the page.
+        """
+        start = perf_counter()
+        if self.extraction == "script":
+            try:
+                pins, num_srcs = find_new_high_res_links(self.browser)
+            except (WebDriverException, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Extracting new images with a script failed, parsing the whole page instead: {e}")
+                self.extraction = "soup"
+        if self.extraction == "soup":
+            pins, num_srcs = find_high_res_links(body)
+        logger.debug(f"Extracted {len(pins)} pins from {num_srcs} images "
+                     f"in {(perf_counter() - start) * 1000:.1f} ms ({self.extraction}).")
+        return pins, num_srcs
+
+    def update_body_html(self):
+        """
+        :returns the body of the current HTML page.
+        """
+        return self.browser.find_element_by_tag_name("body")
+
+    def scroll_down_for_new_body(self):
+        """
+        Scroll down a page in selenium. This is needed because pinterest loads content dynamically on scroll down.
+        Instead of sleeping a fixed time, the page is polled with a growing delay until the number of images or the
+        height of the page changed. The delay starts at the scroll cadence, which is learned from how long pinterest
+        took to load new content in previous scrolls.
+        If nothing changes within the scroll timeout, the board is assumed to be finished and page_grew is False.
+
+        :returns the new HTML body of the document including the newly loaded pins.
+        """
+        start = perf_counter()
+        before = self.browser.execute_script(_SCROLL_JS)
+        wait = self.scroll_cadence
+        while perf_counter() - start < self.scroll_timeout:
+            sleep(wait)
+            # Scroll again, the scroll bar is disabled while pinterest is still loading the last bit of content
+            self.page_grew = self.browser.execute_script(_SCROLL_JS) != before
+            if self.page_grew:
+                elapsed = perf_counter() - start
+                self.scroll_cadence = min(max(0.7 * self.scroll_cadence + 0.3 * elapsed, self.scroll_min_wait),
+                                          self.scroll_max_wait)
+                logger.debug(f"New content after {elapsed:.2f}s, scroll cadence is {self.scroll_cadence:.2f}s.")
+                break
+            wait = min(wait * 1.5, self.scroll_max_wait)
+        else:
+            logger.debug(f"No new content after scrolling for {self.scroll_timeout}s.")
+        return self.update_body_html()
@@ -0,0 +1,63 @@
+import logging
+from time import time
+
+from pinterestDL.files import BoardStateFile
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE_NAME = ".pinterest-dl-checkpoint.json"
+
+
+class Checkpoint(BoardStateFile):
+
+    def __init__(self, download_folder, board_url, interval=30):
+        """
+        Periodically saved state of the crawl of a board, so that an interrupted download can be resumed.
+        The checkpoint holds the urls that were discovered on the page, the frontier of discovered urls
+        that have not been downloaded yet, the counters of the download and the position of the scraper in the page.
+        Which pins were completed or skipped is recorded by the DownloadIndex of the folder.
+
+        :param download_folder: The folder the board is downloaded to. The checkpoint is stored in it.
+        :param board_url: The url of the board. A checkpoint of another url in the same folder is not resumed.
+        :param interval: Minimal time in seconds in between two saves of maybe_save.
+        """
+        super(Checkpoint, self).__init__(download_folder, CHECKPOINT_FILE_NAME, board_url)
+        self.interval = interval
+        self._last_save = time()
+
+    def load(self):
+        """
+        :returns the saved state as a dict with the "discovered" and "frontier" url lists, the number of pins
+                 "downloaded" and "skipped" and the "position" of the scraper. None, if there is no checkpoint
+                 of this board.
+        """
+        state = self.read()
+        if state is None:
+            logger.info("No checkpoint of this board to resume from, starting from the beginning.")
+            return None
+        logger.info(f"Resuming from checkpoint with {len(state['discovered'])} discovered pins, "
+                    f"{len(state['frontier'])} of them not downloaded yet.")
+        return state
+
+    def maybe_save(self, url_cache, pipeline, position=None):
+        """
+        Save the state, if the last save is longer ago than the interval.
+        :param url_cache: The MemorySet of discovered urls.
+        :param pipeline: The DownloadPipeline that downloads the urls.
+        :param position: The position of the scraper after the discovered urls, see Scraper.position.
+        """
+        if time() - self._last_save >= self.interval:
+            self.save(url_cache, pipeline, position=position)
+
+    def save(self, url_cache, pipeline, position=None):
+        """
+        Save the state.
+        :param url_cache: The MemorySet of discovered urls.
+        :param pipeline: The DownloadPipeline that downloads the urls.
+        :param position: The position of the scraper after the discovered urls, see Scraper.position.
+        """
+        state = self.write(position=position, discovered=url_cache.remembered,
+                           frontier=pipeline.frontier + url_cache.unvisited,
+                           downloaded=pipeline.num_downloaded, skipped=pipeline.num_skipped)
+        self._last_save = time()
+        logger.debug(f"Saved checkpoint with {len(state['discovered'])} discovered pins.")
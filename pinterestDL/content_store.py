@@ -0,0 +1,162 @@
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+from pinterestDL.files import TEMPORARY_SUFFIX, atomic_write, remove_if_exists
+
+logger = logging.getLogger(__name__)
+
+URL_MAP_FILE_NAME = "urls.jsonl"
+# Errors of os.link that mean the file system can not hardlink the file to the destination
+_LINK_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+
+def link_or_copy(source, destination):
+    """
+    Hardlink a file to a destination, or copy it if the file system does not support hardlinks between the two.
+    An existing file at the destination is replaced.
+    :param source: The file to link.
+    :param destination: The path of the new link.
+    :returns True, if the file was hardlinked, False if it was copied.
+    """
+    temporary = destination + TEMPORARY_SUFFIX
+    # Left behind by an interrupted run, linking fails if it exists
+    remove_if_exists(temporary)
+    try:
+        os.link(source, temporary)
+    except OSError as e:
+        if e.errno not in _LINK_UNSUPPORTED:
+            raise
+        logger.debug(f"Copying {source}, it can not be hardlinked to {destination}: {e}")
+        with open(source, "rb") as f, atomic_write(destination, temporary=temporary) as copy:
+            shutil.copyfileobj(f, copy)
+        return False
+    os.replace(temporary, destination)
+    return True
+
+
+class ContentStore(object):
+
+    def __init__(self, store_folder):
+        """
+        Content addressed store that keeps a single copy of every image, named by the SHA-256 of its content.
+        Download folders only contain hardlinks to the stored images (or copies, if hardlinks are not possible).
+        The store also remembers which url has which content, so an image that was downloaded for one board is
+        linked into the next board without downloading it again.
+        One store can be shared by all boards and threads.
+
+        :param store_folder: The folder to keep the images and the url map in. Created if it does not exist.
+        """
+        self.store_folder = os.path.abspath(store_folder)
+        self.objects_folder = os.path.join(self.store_folder, "objects")
+        os.makedirs(self.objects_folder, exist_ok=True)
+        self._by_url = {}
+        self._lock = threading.Lock()
+        self.stats = {"stored": 0, "bytes_stored": 0,
+                      "linked_by_url": 0, "bytes_not_downloaded": 0,
+                      "linked_by_content": 0, "bytes_not_written": 0}
+
+        url_map_path = os.path.join(self.store_folder, URL_MAP_FILE_NAME)
+        if os.path.isfile(url_map_path):
+            with open(url_map_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._by_url[record["url"]] = record
+        self._url_map = open(url_map_path, "a")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._url_map.close()
+
+    def lookup_url(self, url):
+        """
+        :param url: The source URL of an image.
+        :returns the record of the stored image downloaded from that url, with the "url", "digest", "path",
+                 "bytes", "width" and "height" fields. None, if the url was never stored or the image is missing.
+        """
+        record = self._by_url.get(url)
+        if record is None or not os.path.isfile(record["path"]):
+            return None
+        return record
+
+    def link_known(self, record, destination):
+        """
+        Link an image that is already in the store into a download folder instead of downloading it again.
+        :param record: The record returned by lookup_url.
+        :param destination: The path to link the image to.
+        """
+        link_or_copy(record["path"], destination)
+        with self._lock:
+            self.stats["linked_by_url"] += 1
+            self.stats["bytes_not_downloaded"] += record["bytes"]
+
+    def discard(self, url):
+        """
+        Remove the stored image of a url, e.g. because it turned out to be corrupt, so that it is not linked
+        anymore and downloaded again instead. Download folders that link to it keep their copy.
+        :param url: The source URL of the image.
+        """
+        record = self._by_url.get(url)
+        if record is None:
+            return
+        try:
+            os.remove(record["path"])
+        except FileNotFoundError:
+            pass
+
+    def put(self, url, data, destination, width=None, height=None):
+        """
+        Store a downloaded image, unless an image with the same content is already stored, and link it to the
+        destination.
+        :param url: The source URL of the image.
+        :param data: The bytes of the image.
+        :param destination: The path to link the image to.
+        :param width: The width of the image.
+        :param height: The height of the image.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        extension = os.path.splitext(destination)[1]
+        path = os.path.join(self.objects_folder, digest[:2], digest + extension)
+
+        known_content = os.path.isfile(path)
+        if not known_content:
+            # Write under a name unique to this thread, in case another thread stores the same content right now
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_write(path, temporary=f"{path}.{threading.get_ident()}{TEMPORARY_SUFFIX}") as f:
+                f.write(data)
+
+        record = {"url": url, "digest": digest, "path": path, "bytes": len(data), "width": width, "height": height}
+        with self._lock:
+            self._by_url[url] = record
+            self._url_map.write(json.dumps(record) + "\n")
+            self._url_map.flush()
+            if known_content:
+                self.stats["linked_by_content"] += 1
+                self.stats["bytes_not_written"] += len(data)
+            else:
+                self.stats["stored"] += 1
+                self.stats["bytes_stored"] += len(data)
+
+        link_or_copy(path, destination)
+
+    def report(self):
+        """
+        :returns a human readable summary of how much the store deduplicated.
+        """
+        return (f"Content store: {self.stats['stored']} new images ({self.stats['bytes_stored'] / 1e6:.1f} MB), "
+                f"{self.stats['linked_by_url']} linked without downloading "
+                f"({self.stats['bytes_not_downloaded'] / 1e6:.1f} MB), "
+                f"{self.stats['linked_by_content']} duplicates by content "
+                f"({self.stats['bytes_not_written'] / 1e6:.1f} MB not written).")
@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from pinterestDL.files import TEMPORARY_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = ".pinterest-dl-index.jsonl"
+
+
+class DownloadIndex(object):
+
+    def __init__(self, download_folder):
+        """
+        Persistent index of the pins that were downloaded to or rejected for a folder.
+        The index is an append-only log with one JSON record per line, which is read into memory once,
+        so that looking up a pin takes constant time and the folder never has to be listed again.
+        If a folder has no index yet, the files already in it are recorded once.
+
+        :param download_folder: The folder whose pins are indexed. The index file is stored in it.
+        """
+        self.path = os.path.join(download_folder, INDEX_FILE_NAME)
+        self._by_url = {}
+        self._by_title = {}
+        self._lock = threading.Lock()
+
+        if os.path.isfile(self.path):
+            self._load()
+            self._log = open(self.path, "a")
+        else:
+            self._log = open(self.path, "a")
+            self._import_folder(download_folder)
+
+    def __len__(self):
+        return len(self._by_title)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._log.close()
+
+    def lookup(self, url, title):
+        """
+        :param url: The source URL of a pin.
+        :param title: The title under which the pin is stored.
+        :returns the record of the pin, if it is known by its url or its title. None otherwise.
+                 A record is a dict with the "url", "title", "status", "bytes", "width", "height" and "time" fields,
+                 where "status" is the reason of the status report of its download.
+        """
+        record = self._by_url.get(url)
+        if record is None:
+            record = self._by_title.get(title)
+        return record
+
+    def add(self, url, title, status, num_bytes=None, width=None, height=None):
+        """
+        Record the outcome of downloading a pin, overwriting any earlier record of it.
+        :param url: The source URL of the pin.
+        :param title: The title under which the pin is stored.
+        :param status: The reason of the status report, e.g. 'valid' or 'err_size'.
+        :param num_bytes: The size of the image file in bytes, if known.
+        :param width: The width of the image, if known.
+        :param height: The height of the image, if known.
+        """
+        record = {"url": url, "title": title, "status": status, "bytes": num_bytes,
+                  "width": width, "height": height, "time": time.time()}
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._insert(record)
+            self._log.write(line)
+            self._log.flush()
+
+    def _insert(self, record):
+        if record["url"] is not None:
+            self._by_url[record["url"]] = record
+        self._by_title[record["title"]] = record
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    self._insert(json.loads(line))
+                except ValueError:
+                    # The last line may be cut off if the script was killed while writing it
+                    logger.debug(f"Ignoring broken line in {self.path}.")
+        logger.debug(f"Loaded {len(self)} pins from {self.path}.")
+
+    def _import_folder(self, download_folder):
+        """
+        Record the images in a folder that was downloaded to before the index existed.
+        """
+        lines = []
+        with os.scandir(download_folder) as entries:
+            for entry in entries:
+                # Partial files of interrupted downloads are not complete images
+                if entry.name != INDEX_FILE_NAME and not entry.name.endswith(TEMPORARY_SUFFIX) and entry.is_file():
+                    record = {"url": None, "title": entry.name, "status": "valid", "bytes": entry.stat().st_size,
+                              "width": None, "height": None, "time": time.time()}
+                    self._insert(record)
+                    lines.append(json.dumps(record) + "\n")
+        self._log.writelines(lines)
+        self._log.flush()
+        logger.debug(f"Indexed {len(self)} pins already present in {download_folder}.")
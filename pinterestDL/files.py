@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+import json
+import logging
+import os
+from time import time
+
+logger = logging.getLogger(__name__)
+
+# Suffix of files that are still being written. The DownloadIndex does not take them for downloaded images.
+TEMPORARY_SUFFIX = ".part"
+
+
+def remove_if_exists(path):
+    """
+    :param path: The path of a file that may not exist.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def atomic_write(path, mode="wb", temporary=None):
+    """
+    Open a temporary file to write a file, and rename it to its path only once it was written completely,
+    so that an interruption never leaves a truncated file behind. An existing file at the path is replaced.
+    :param path: The path of the file to write.
+    :param mode: The mode to open the file with, 'wb' or 'w'.
+    :param temporary: The path of the temporary file. Defaults to the path with TEMPORARY_SUFFIX, give a unique one
+           if several threads may write the same file at the same time.
+    :returns a context manager of the opened temporary file.
+    """
+    temporary = path + TEMPORARY_SUFFIX if temporary is None else temporary
+    try:
+        with open(temporary, mode) as f:
+            yield f
+        os.replace(temporary, path)
+    except BaseException:
+        remove_if_exists(temporary)
+        raise
+
+
+class BoardStateFile(object):
+
+    def __init__(self, download_folder, file_name, board_url):
+        """
+        A JSON file in a download folder with state that belongs to the board downloaded into it.
+        The state of another board in the same folder is ignored.
+
+        :param download_folder: The folder the board is downloaded to. The file is stored in it.
+        :param file_name: The name of the file.
+        :param board_url: The url of the board.
+        """
+        self.path = os.path.join(download_folder, file_name)
+        self.board_url = board_url
+
+    def read(self):
+        """
+        :returns the saved state as a dict with the "board_url" and the "time" it was written at, and the fields
+                 given to write. None, if there is no state or it belongs to another board.
+        """
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("board_url") != self.board_url:
+            logger.info(f"Ignoring {os.path.basename(self.path)}, it belongs to {state.get('board_url')}.")
+            return None
+        return state
+
+    def write(self, **fields):
+        """
+        Save the state of the board.
+        :param fields: The JSON serializable fields of the state.
+        :returns the written state.
+        """
+        state = dict(board_url=self.board_url, time=time(), **fields)
+        with atomic_write(self.path, "w") as f:
+            json.dump(state, f)
+        return state
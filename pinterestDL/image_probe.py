@@ -0,0 +1,58 @@
+from PIL import ImageFile
+
+# Bytes to read from the network at once while downloading an image
+CHUNK_SIZE = 16 * 1024
+# Give up probing if the header was not found within this many bytes, e.g. because of huge EXIF blocks
+MAX_PROBE_BYTES = 256 * 1024
+
+
+class SizeProbe(object):
+
+    def __init__(self, size_verifier, content_length=None, max_probe_bytes=MAX_PROBE_BYTES):
+        """
+        Finds the dimensions of an image from the first chunks of a download, so that images that
+        are too small can be aborted before they are fully transferred.
+        Uses the incremental parser of PIL, which reads the JPEG SOF, PNG IHDR, GIF or WebP header.
+
+        :param size_verifier: Filter function to discard image based on its size.
+        :param content_length: The announced size of the whole download in bytes, if known.
+        :param max_probe_bytes: Number of bytes after which the size is only checked after the full download.
+        """
+        self.verify_size = size_verifier
+        self.content_length = content_length
+        self.max_probe_bytes = max_probe_bytes
+        self.bytes_read = 0
+        self.size = None
+        self._parser = ImageFile.Parser()
+
+    @property
+    def bytes_saved(self):
+        """
+        :returns the number of bytes that were not transferred, if the download was aborted now.
+        """
+        if self.content_length is None:
+            return 0
+        return max(self.content_length - self.bytes_read, 0)
+
+    def feed(self, chunk):
+        """
+        Feed the next chunk of the download to the probe.
+        :param chunk: The next bytes of the image.
+        :returns False, if the image is known to be too small and the download should be aborted. True otherwise.
+        """
+        probing = self.size is None and self.bytes_read < self.max_probe_bytes
+        self.bytes_read += len(chunk)
+        if not probing:
+            return True
+
+        try:
+            self._parser.feed(chunk)
+        except Exception:
+            # Not an image PIL can parse incrementally, verify after the full download
+            self.max_probe_bytes = 0
+            return True
+
+        if self._parser.image is not None:
+            self.size = self._parser.image.size
+            return self.verify_size(*self.size)
+        return True
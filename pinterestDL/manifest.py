@@ -0,0 +1,96 @@
+from datetime import datetime
+import logging
+
+from pinterestDL.files import BoardStateFile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".pinterest-dl-manifest.json"
+
+
+def pin_key(pin):
+    """
+    :param pin: A pin record made by make_pin.
+    :returns the id of the pin, or the url of its image if the scraper does not know its id.
+    """
+    return pin["id"] if pin["id"] is not None else pin["url"]
+
+
+class Manifest(BoardStateFile):
+
+    def __init__(self, download_folder, board_url, streak=10):
+        """
+        The pins of a board in page order as of its last sync, for downloading only the pins that were added since.
+        Pinterest shows the newest pins of a board first, so a sync stops scrolling as soon as it finds a streak of
+        pins that are already in the manifest. Pins that were not downloaded completely are left out of the manifest,
+        so that the next sync tries them again.
+
+        :param download_folder: The folder the board is downloaded to. The manifest is stored in it.
+        :param board_url: The url of the board. A manifest of another url in the same folder is not used.
+        :param streak: Number of consecutive known pins after which the rest of the board is assumed to be known.
+        """
+        super(Manifest, self).__init__(download_folder, MANIFEST_FILE_NAME, board_url)
+        self.streak = streak
+        self.last_sync = None
+        # Wether the last sync saw the whole board, otherwise pins below the known ones may still be missing
+        self.complete = False
+        self.reached_known = False
+        self._previous = []
+        self._known = set()
+        # Urls of the pins found in this sync by their key, in page order
+        self._found = {}
+        self._run = 0
+
+    def load(self):
+        """
+        Load the manifest of the last sync of the board, if there is one.
+        :returns True, if there was a manifest of this board.
+        """
+        state = self.read()
+        if state is None:
+            logger.info("No manifest of an earlier sync of this board, downloading the whole board.")
+            return False
+        self._previous = state["pins"]
+        self._known = set(self._previous)
+        self.last_sync = state["time"]
+        self.complete = state["complete"]
+        logger.info(f"Syncing {len(self._previous)} pins known from the sync at "
+                    f"{datetime.fromtimestamp(self.last_sync):%Y-%m-%d %H:%M}.")
+        if not self.complete:
+            logger.info("The last sync did not see the whole board, checking all of it.")
+        return True
+
+    def scan(self, pins):
+        """
+        Record the found pins in page order and look for a streak of known pins.
+        :param pins: Pin records in the order they appear on the page.
+        :returns the pins that are not known from the last sync.
+        """
+        new_pins = []
+        for pin in pins:
+            key = pin_key(pin)
+            if key in self._found:
+                continue
+            self._found[key] = pin["url"]
+            if key in self._known:
+                self._run += 1
+                # Boards with fewer pins than a streak are known once all of them were found again
+                if self.complete and self._run >= min(self.streak, len(self._known)):
+                    self.reached_known = True
+            else:
+                self._run = 0
+                new_pins.append(pin)
+        return new_pins
+
+    def save(self, unfinished, complete):
+        """
+        Save the pins found in this sync, followed by the known pins that were not found again.
+        :param unfinished: The urls of pins that were found, but not downloaded or rejected, or that were corrupt.
+        :param complete: True, if this sync saw the whole board.
+        """
+        unfinished = set(unfinished)
+        pins = [key for key, url in self._found.items() if key in self._known or url not in unfinished]
+        pins += [key for key in self._previous if key not in self._found]
+        complete = complete or (self.complete and self.reached_known)
+        self.write(complete=complete, pins=pins)
+        logger.debug(f"Saved manifest with {len(pins)} pins.")
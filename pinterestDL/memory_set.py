@@ -1,33 +1,87 @@
-class MemorySet(list):
+from collections import OrderedDict, deque
 
-    def __init__(self, *args, **kwargs):
+
+class MemorySet(object):
+
+    def __init__(self, entries=(), max_size=None):
         """
         A ordered set that keeps track of the last iteration trough it and starts at the end in the next iteration.
+        Membership is checked with a hash index, so adding entries takes constant time per entry.
+
+        :param entries: Initial entries of the set.
+        :param max_size: If given, only remember this many entries to keep the memory bounded on endless pages.
+               The oldest entries are forgotten first, so an entry that was seen more than max_size entries ago
+               is treated as new again.
         """
-        self.last_len = 0
-        super(MemorySet, self).__init__(*args, **kwargs)
+        self.max_size = max_size
+        self._num_entries = 0
+        self._seen = OrderedDict()
+        self._unvisited = deque()
+        self.update(entries)
+
+    def __len__(self):
+        """
+        :returns the number of entries that were ever added.
+        """
+        return self._num_entries
+
+    def __contains__(self, entry):
+        return entry in self._seen
 
     def __iter__(self):
         """
-        Start iteration at the last index that was not iterated trough last time.
+        Yield only the entries that were not iterated trough before, in the order they were added.
+        Entries are marked as visited when they are yielded, so a stopped iteration continues in the next one.
+        """
+        while self._unvisited:
+            yield self._unvisited.popleft()
+
+    @property
+    def remembered(self):
+        """
+        :returns a list of the remembered entries in the order they were added, at most max_size of them.
         """
-        iterator = iter(self[self.last_len:])
-        self.last_len = len(self)
-        return iterator
+        return list(self._seen)
+
+    @property
+    def unvisited(self):
+        """
+        :returns a list of the entries that have not been iterated trough yet.
+        """
+        return list(self._unvisited)
 
     def update(self, more_entries):
         """
         Inserts new elements into the MemorySet. Values that are already present in the MemorySet will not be
         added again.
 
-        :param more_entries: Iterable that can be converted to a set. All elements not already present will be added.
+        :param more_entries: Iterable of hashable entries. All elements not already present will be added,
+               in the order they appear.
         :returns True, if any elements were added, False otherwise.
         """
-        temp_entries = set(more_entries)
-        additions = [x for x in temp_entries if x not in self]
+        added = False
+        for entry in more_entries:
+            if self._remember(entry):
+                self._unvisited.append(entry)
+                added = True
+        return added
 
-        if len(additions) == 0:
+    def mark_visited(self, entries):
+        """
+        Add entries that should never be iterated trough, e.g. because they were processed in an earlier run.
+        :param entries: Iterable of hashable entries.
+        """
+        for entry in entries:
+            self._remember(entry)
+
+    def _remember(self, entry):
+        """
+        :returns True, if the entry was not remembered yet.
+        """
+        if entry in self._seen:
             return False
-        else:
-            self.extend(additions)
-            return True
+        self._seen[entry] = None
+        self._num_entries += 1
+        if self.max_size is not None and len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return True
@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+import json
+import logging
+import threading
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the histogram buckets, doubling from 1 ms to about a minute
+BUCKET_BOUNDS = [0.001 * 2 ** i for i in range(17)]
+
+
+class Histogram(object):
+
+    def __init__(self):
+        """
+        Histogram of durations in buckets of exponentially growing size, with the exact count, total, minimum and
+        maximum. Not thread-safe on its own, Metrics guards it with its lock.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKET_BOUNDS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """
+        :param fraction: The fraction of observations below the percentile, e.g. 0.9.
+        :returns the upper bound of the bucket that contains the percentile, or the maximum if that is lower.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def report(self):
+        """
+        :returns a dict with the statistics of the observations in seconds, and the counts per bucket.
+        """
+        if self.count == 0:
+            return {"count": 0}
+        bucket_names = [f"<={bound * 1000:g}ms" for bound in BUCKET_BOUNDS] + [f">{BUCKET_BOUNDS[-1] * 1000:g}ms"]
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count,
+                "min": self.min, "max": self.max,
+                "p50": self.percentile(0.5), "p90": self.percentile(0.9), "p99": self.percentile(0.99),
+                "histogram": {name: count for name, count in zip(bucket_names, self.buckets) if count}}
+
+
+class Metrics(object):
+
+    def __init__(self):
+        """
+        Timers and counters of the stages of a download, shared by all threads and boards of a run.
+        Timers are histograms of the durations of a stage, e.g. "page_load", "scroll" (one scroll round, or one page
+        of a feed), "extraction", "submit_wait" (the scraper waiting for free space in the queue), "queue_wait"
+        (a pin waiting for a worker), "rate_limit_wait", "request", "verify" and "write".
+        Counters count things like "pins_downloaded", "bytes_downloaded" or "retries".
+        """
+        self.start = perf_counter()
+        self.timers = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._stop_reporting = None
+
+    def observe(self, name, seconds):
+        """
+        Record a duration of a stage.
+        :param name: The name of the timer.
+        :param seconds: The duration.
+        """
+        with self._lock:
+            if name not in self.timers:
+                self.timers[name] = Histogram()
+            self.timers[name].observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Record how long the body of a with-statement takes.
+        :param name: The name of the timer.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start)
+
+    def add(self, name, value=1):
+        """
+        Increase a counter.
+        :param name: The name of the counter.
+        :param value: The amount to add.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def throughput(self):
+        """
+        :returns the number of pins downloaded and megabytes transferred per second since the start.
+        """
+        elapsed = max(perf_counter() - self.start, 1e-9)
+        with self._lock:
+            return (self.counters.get("pins_downloaded", 0) / elapsed,
+                    self.counters.get("bytes_downloaded", 0) / 1e6 / elapsed)
+
+    def report(self):
+        """
+        :returns a dict with the "elapsed" seconds, the "throughput", all "counters" and the statistics of all "timers".
+        """
+        pins_per_second, megabytes_per_second = self.throughput()
+        with self._lock:
+            return {"elapsed": perf_counter() - self.start,
+                    "throughput": {"pins_per_second": pins_per_second, "megabytes_per_second": megabytes_per_second},
+                    "counters": dict(self.counters),
+                    "timers": {name: timer.report() for name, timer in self.timers.items()}}
+
+    def write_report(self, path):
+        """
+        Write the report as JSON.
+        :param path: The file to write to.
+        """
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        logger.debug(f"Wrote statistics to {path}.")
+
+    def start_reporting(self, interval):
+        """
+        Log the throughput of the last interval periodically in a background thread, until stop_reporting is called.
+        :param interval: Seconds in between two log lines.
+        """
+        self._stop_reporting = threading.Event()
+        threading.Thread(target=self._report_periodically, args=(interval, self._stop_reporting),
+                         name="pin-metrics", daemon=True).start()
+
+    def stop_reporting(self):
+        """
+        Stop logging the throughput.
+        """
+        if self._stop_reporting is not None:
+            self._stop_reporting.set()
+
+    def _report_periodically(self, interval, stop):
+        last_time, last_pins, last_bytes = perf_counter(), 0, 0
+        while not stop.wait(interval):
+            now = perf_counter()
+            with self._lock:
+                pins = self.counters.get("pins_downloaded", 0)
+                num_bytes = self.counters.get("bytes_downloaded", 0)
+            elapsed = now - last_time
+            logger.info(f"Throughput: {(pins - last_pins) / elapsed:.1f} pins/s, "
+                        f"{(num_bytes - last_bytes) / 1e6 / elapsed:.2f} MB/s "
+                        f"({pins} pins, {num_bytes / 1e6:.1f} MB in total).")
+            last_time, last_pins, last_bytes = now, pins, num_bytes
@@ -1,39 +1,40 @@
 #! /usr/bin/env python
 
-import concurrent.futures
+import asyncio
 from datetime import datetime
+import http.client
+import io
+import itertools
 import os
-from time import sleep
+import queue
+import threading
+from time import perf_counter, sleep
 
-from bs4 import BeautifulSoup
 import logging
 from PIL import Image
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
+import urllib.error
 import urllib.request
 
+from pinterestDL.async_engine import AsyncDownloadPipeline
+from pinterestDL.browser_scraper import EXTRACTIONS, BrowserScraper
+from pinterestDL.checkpoint import Checkpoint
+from pinterestDL.download_index import DownloadIndex
+from pinterestDL.files import atomic_write
+from pinterestDL.image_probe import CHUNK_SIZE, SizeProbe
+from pinterestDL.manifest import Manifest
 from pinterestDL.memory_set import MemorySet
+from pinterestDL.metrics import Metrics
+from pinterestDL.pipeline import DownloadPipeline
+from pinterestDL.resource_scraper import LOAD_ERRORS, ResourceScraper
+from pinterestDL.retry import RETRY_STATUSES, DownloadError, HostRateLimiter, backoff_delay, parse_retry_after
+from pinterestDL.scraper import split_by_size
 
 """Use this script to download pinterest pages or boards. Requires python >= 3.6 and selenium chrome driver in $PATH."""
 
 logger = logging.getLogger(__name__)
 
-
-def find_num_pins(body):
-    """
-    :param body: the HTML body of a pinterest page.
-    :returns the number of pins in the pinterest board, or infinity if a tag page was given.
-    """
-
-    spans = body.find_elements_by_tag_name("span")
-    num_elements = float("inf")  # If we download from a tag page, return as many as possible
-    for i, span in enumerate(spans):
-        if "Pins" in span.text:
-            num_elements = int(span.text.split(" ")[0])
-            break
-
-    logger.debug(f"Found the provided page to contain {num_elements} pins.")
-    return num_elements
+ENGINES = ["thread", "async"]
+SCRAPERS = ["browser", "resource"]
 
 
 def find_board_name(board_url):
@@ -58,23 +59,13 @@ def find_board_name(board_url):
     return board_name
 
 
-def find_high_res_links(body):
-    """
-    :param body: The body of a pinterest html page.
-    :returns a list of links to the image sources of the pins in the body element.
-    """
-    soup = BeautifulSoup(body.get_attribute("outerHTML"), "html.parser")
-    low_res_imgs = soup.find_all("img")
-    return [img["src"] for img in low_res_imgs], len(low_res_imgs)
-
-
-def retrieve_bord_info(board_url, download_folder, body, num_pins=None, board_name=None):
+def retrieve_bord_info(board_url, download_folder, num_available_pins, num_pins=None, board_name=None):
     """
     Collects some useful information from a pinterest page and changes the user input on the command line
     to follow the requirements of the script.
     :param board_url: URL of a pinterest page.
     :param download_folder: Folder into which to download the pins.
-    :param body: HTML body of that page.
+    :param num_available_pins: The number of pins on that page, infinity on tag pages.
     :param num_pins: The number of pins to download, if supplied by the user.
     :param board_name: The name of the board, if supplied by the user.
 
@@ -84,7 +75,6 @@ def retrieve_bord_info(board_url, download_folder, body, num_pins=None, board_na
         board_name = find_board_name(board_url)
 
     # Find the number of pins to download, minimum between available pins and requested pins
-    num_available_pins = find_num_pins(body)
     if num_pins is None:
         num_pins = num_available_pins
     else:
@@ -98,6 +88,29 @@ def retrieve_bord_info(board_url, download_folder, body, num_pins=None, board_na
     return board_name, num_pins, download_folder
 
 
+def extract_title(high_res_source):
+    """
+    :param high_res_source: The source URL of an image.
+    :returns the file name under which the image is stored, extracted from the link.
+    """
+    stripped_slashes = high_res_source.split("/")[-1]
+    return stripped_slashes.split("--")[-1]
+
+
+def pin_result(high_res_source, download_report):
+    """
+    :param high_res_source: The source URL of a processed image.
+    :param download_report: The status report of the Downloader, or of the pipeline for pins that failed.
+    :returns a dict with the "url" and "title" of the pin, its "status", which is 'valid' for downloaded pins and
+             the reason otherwise, wether it was "downloaded", and the "width", "height", "bytes" and "path" of the
+             image as far as they are known.
+    """
+    return {"url": high_res_source, "title": download_report.get("title") or extract_title(high_res_source),
+            "status": download_report["reason"], "downloaded": download_report["downloaded"],
+            "width": download_report.get("width"), "height": download_report.get("height"),
+            "bytes": download_report.get("bytes"), "path": download_report.get("path")}
+
+
 def _get_size_verifier(min_x, min_y, mode):
     """
     Depending on what the user wants, we need to filter image sizes differently.
@@ -131,41 +144,62 @@ def _get_size_verifier(min_x, min_y, mode):
         return anything_goes
 
 
-def _handle_download_report(future, url):
-    """
-    Handles the result of downloading an image.
-    :param future: The Future instance that downloaded an image.
-    :param url: The url where the image was downloaded from.
-
-    :return True, if the image was downloaded. False, if the image was skipped, discarded, or timed out.
-    """
-    download_report = future.result()
-    downloaded = True
-    if not download_report["downloaded"]:
-        reason = download_report["reason"]
-        downloaded = False
-
-        if reason == "err_timeout":
-            logger.warning(f"Could not download {url}: {reason}")
-        else:
-            logger.debug(f"Could not download {url}: {reason}")
-
-    return downloaded
-
-
 class Downloader(object):
 
-    def __init__(self, download_folder, size_verifier):
+    def __init__(self, download_folder, size_verifier, content_store=None, metrics=None,
+                 rate_limiter=None, retries=4, timeout=30, post_processor=None, sink=None):
         """
         Downloader of individual links to images.
+        Use it in a with-statement, so that the index of the download folder is closed.
 
         :param download_folder: The folder to download the image to.
         :param size_verifier: Filter function to discard image based on its size.
+        :param content_store: A ContentStore to keep the images in. The download folder then only contains links.
+        :param metrics: The Metrics to record the request, verify and write times in.
+        :param rate_limiter: The HostRateLimiter to wait for before every request.
+        :param retries: Number of times a request that failed for a temporary reason is tried again.
+        :param timeout: Time in seconds to wait for the connection to a host, and for every read from it.
+        :param post_processor: A PostProcessor to hand the written images to.
+        :param sink: Callable that takes the url, status report and bytes of every valid image, to deliver the images
+               somewhere else than the download folder. Only the index is kept in the folder then, so the content store
+               and the post-processor are not used.
         """
         self.download_folder = download_folder
         self.verify_size = size_verifier
-        # Read the directory for images that have already been downloaded
-        self.previously_downloaded = os.listdir(self.download_folder)
+        self.content_store = content_store
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter()
+        self.retries = retries
+        self.timeout = timeout
+        self.post_processor = post_processor if sink is None else None
+        self.sink = sink
+        if sink is not None:
+            self.content_store = None
+        # Urls of the images that turned out to be corrupt
+        self.corrupt = []
+        self._num_post_processing = 0
+        self._post_processed = threading.Condition()
+        # Index of the images that have already been downloaded or rejected in previous runs of the script
+        self.index = DownloadIndex(self.download_folder)
+
+    @property
+    def num_corrupt(self):
+        """
+        :returns the number of images that turned out to be corrupt.
+        """
+        return len(self.corrupt)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Wait for the post-processing of the images of this folder, then close its index.
+        """
+        with self._post_processed:
+            while self._num_post_processing > 0:
+                self._post_processed.wait()
+        self.index.close()
 
     def __call__(self, *args, **kwargs):
         """
@@ -177,84 +211,365 @@ class Downloader(object):
         """
         Download an image from a URL that points to a single image.
         The name of the image is extracted from the link, if possible.
+        Requests that fail for a temporary reason, like a timeout or a '503 Service Unavailable', are retried
+        after a growing delay.
         :param high_res_source: The source URL of the image to download.
         :returns the status report on how the download went.
-                 A status report is a dict containing "downloaded" and "reason" fields.
+                 A status report is a dict containing "downloaded" and "reason" fields, the "title" of the image and,
+                 as far as they are known, its "width", "height", number of "bytes" and the "path" it is stored at.
+                 It contains "bytes_saved" if the download was aborted early.
+        :raises DownloadError: if the request still failed after all retries.
         """
-        # Try to extract a title
-        stripped_slashes = high_res_source.split("/")[-1]
-        title = stripped_slashes.split("--")[-1]
+        title, status_report = self.check_known(high_res_source)
+        if status_report is not None:
+            return status_report
 
-        status_report = {"downloaded": True, "reason": "valid"}
-
-        # Check if the image is already present in the folder from previous runs of the script
-        if title in self.previously_downloaded:
-            logger.info(f"Skipping {title}, already downloaded")
-            status_report["downloaded"] = False
-            status_report["reason"] = "err_present"
-        else:
-            destination = os.path.join(self.download_folder, title)
+        for attempt in itertools.count():
+            self.wait_for_host(high_res_source)
+            status, retry_after = None, None
+            try:
+                data, status_report = self._request(high_res_source, title)
+                break
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES:
+                    logger.warning(f"Could not download Pin {title}: {e}")
+                    return {"downloaded": False, "reason": "err_http", "title": title}
+                error, status, retry_after = e, e.code, parse_retry_after(e.headers.get("Retry-After"))
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                # Also socket timeouts, refused or reset connections and connections that died mid-image
+                error = e
+            delay = self.retry_delay(high_res_source, attempt, error, status=status, retry_after=retry_after)
+            if delay is None:
+                raise DownloadError(high_res_source, error) from error
+            sleep(delay)
+
+        self.rate_limiter.succeeded(high_res_source)
+        if status_report is not None:
+            return status_report
+        return self.store(high_res_source, title, data)
+
+    def _request(self, high_res_source, title):
+        """
+        Request an image once, but abort as soon as its header shows that it is too small.
+        :param high_res_source: The source URL of the image.
+        :param title: The title under which the image is stored.
+        :returns the bytes of the image and None, or None and the status report if the download was aborted.
+        """
+        start = perf_counter()
+        with urllib.request.urlopen(high_res_source, timeout=self.timeout) as response:
+            probe = SizeProbe(self.verify_size, content_length=response.length)
+            chunks = []
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                chunks.append(chunk)
+                if not probe.feed(chunk):
+                    self.metrics.observe("request", perf_counter() - start)
+                    return None, self.reject_early(high_res_source, title, probe)
+            data = b"".join(chunks)
+        # Reading in chunks returns what arrived when the connection dies, instead of raising
+        if probe.content_length is not None and len(data) < probe.content_length:
+            raise http.client.IncompleteRead(data, probe.content_length - len(data))
+        self.metrics.observe("request", perf_counter() - start)
+        self.metrics.add("bytes_downloaded", len(data))
+        return data, None
+
+    def wait_for_host(self, high_res_source):
+        """
+        Block until the rate limit of the host of the url allows another request.
+        :param high_res_source: The source URL of the image to request.
+        """
+        start = perf_counter()
+        wait = self.rate_limiter.acquire(high_res_source)
+        if wait > 0:
+            while wait > 0:
+                sleep(wait)
+                wait = self.rate_limiter.acquire(high_res_source)
+            self.metrics.observe("rate_limit_wait", perf_counter() - start)
+
+    def retry_delay(self, high_res_source, attempt, error, status=None, retry_after=None):
+        """
+        Decide how long to wait before trying a failed request again, and back off from hosts that throttle us.
+        :param high_res_source: The source URL of the failed request.
+        :param attempt: The number of the attempt that failed, starting at 0.
+        :param error: The error the request failed with.
+        :param status: The HTTP status of the response, if there was one.
+        :param retry_after: Seconds the host asked to wait before trying again, if it did.
+        :returns the seconds to wait, or None if no retries are left.
+        """
+        if status == 429:
+            self.metrics.add("throttled")
+            self.rate_limiter.throttled(high_res_source, retry_after=retry_after)
+        if attempt >= self.retries:
+            return None
+        self.metrics.add("retries")
+        delay = backoff_delay(attempt, retry_after=retry_after)
+        logger.debug(f"Retrying {high_res_source} in {delay:.1f}s after: {error}")
+        return delay
+
+    def check_known(self, high_res_source):
+        """
+        Check if the image has already been downloaded in previous runs of the script, or was rejected for a size
+        that still does not meet the size constraints. If the image was downloaded for another board into the
+        content store, it is linked into the download folder instead of downloading it again.
+        :param high_res_source: The source URL of the image to download.
+        :returns the title under which the image is stored and the status report of the skipped or linked download,
+                 if the image is known. If it is not known, the status report is None.
+        """
+        title = extract_title(high_res_source)
+        record = self.index.lookup(high_res_source, title)
+        if record is not None:
+            if record["status"] == "valid":
+                logger.info(f"Skipping {title}, already downloaded")
+                return title, self._report("err_present", record["title"], record["width"], record["height"],
+                                           record["bytes"], stored=self.sink is None)
+            if record["status"] == "err_size" and record["width"] is not None \
+                    and not self.verify_size(record["width"], record["height"]):
+                logger.debug(f"Skipping {title}, rejected for its size before")
+                return title, self._report("err_size", title, record["width"], record["height"], record["bytes"])
+
+        stored = self.content_store.lookup_url(high_res_source) if self.content_store is not None else None
+        if stored is not None and self.verify_size(stored["width"], stored["height"]):
+            self.content_store.link_known(stored, os.path.join(self.download_folder, title))
+            self.index.add(high_res_source, title, "valid", num_bytes=stored["bytes"],
+                           width=stored["width"], height=stored["height"])
+            logger.debug(f"Linked {title} from the content store")
+            self.post_process(high_res_source, title)
+            return title, self._report("valid", title, stored["width"], stored["height"], stored["bytes"], stored=True)
+        return title, None
+
+    def reject_early(self, high_res_source, title, probe):
+        """
+        Record an image whose download was aborted, because its header showed that it is too small.
+        :param high_res_source: The source URL of the image.
+        :param title: The title under which the image would have been stored.
+        :param probe: The SizeProbe that found the image size.
+        :returns the status report of the aborted download.
+        """
+        width, height = probe.size
+        self.metrics.add("bytes_downloaded", probe.bytes_read)
+        self.index.add(high_res_source, title, "err_size", num_bytes=probe.content_length, width=width, height=height)
+        report = self._report("err_size", title, width, height, probe.content_length)
+        report["bytes_saved"] = probe.bytes_saved
+        return report
+
+    def store(self, high_res_source, title, data):
+        """
+        Write a downloaded image to the download folder or hand it to the sink, if it meets the size constraints.
+        :param high_res_source: The source URL of the image.
+        :param title: The title under which the image is stored.
+        :param data: The bytes of the image.
+        :returns the status report on how the download went.
+        """
+        with self.metrics.timer("verify"):
             try:
-                # Download the image
-                urllib.request.urlretrieve(high_res_source, destination)
-                img = Image.open(destination)
-                width, height = img.size
-                # If the image was smaller then we want, we delete it again
-                if not self.verify_size(width, height):
-                    os.remove(destination)
-                    status_report["downloaded"] = False
-                    status_report["reason"] = "err_size"
-            except urllib.request.ContentTooShortError:
-                logger.warning(f"Connection died during download of Pin {title}.")
-                status_report["downloaded"] = False
-                status_report["reason"] = "err_timeout"
-
-        return status_report
+                width, height = Image.open(io.BytesIO(data)).size
+            except (OSError, SyntaxError, ValueError) as e:
+                # E.g. an error page that was served as the image, or a damaged image on the host
+                logger.warning(f"Could not download Pin {title}, it is not a valid image: {e}")
+                self._record_corrupt(high_res_source, title)
+                return self._report("err_corrupt", title, num_bytes=len(data))
+        # If the image is smaller then we want, it is not written at all
+        if not self.verify_size(width, height):
+            self.index.add(high_res_source, title, "err_size", num_bytes=len(data), width=width, height=height)
+            return self._report("err_size", title, width, height, len(data))
+
+        destination = os.path.join(self.download_folder, title)
+        report = self._report("valid", title, width, height, len(data), stored=self.sink is None)
+        with self.metrics.timer("write"):
+            if self.sink is not None:
+                self.sink(high_res_source, report, data)
+            elif self.content_store is not None:
+                self.content_store.put(high_res_source, data, destination, width=width, height=height)
+            else:
+                with atomic_write(destination) as f:
+                    f.write(data)
+        self.index.add(high_res_source, title, "valid", num_bytes=len(data), width=width, height=height)
+        self.post_process(high_res_source, title)
+        return report
+
+    def _report(self, reason, title, width=None, height=None, num_bytes=None, stored=False):
+        """
+        :returns a status report with the given reason and the known properties of the image.
+                 The "path" is only set if the image is stored in the download folder.
+        """
+        return {"downloaded": reason == "valid", "reason": reason, "title": title, "width": width, "height": height,
+                "bytes": num_bytes, "path": os.path.join(self.download_folder, title) if stored else None}
+
+    def post_process(self, high_res_source, title):
+        """
+        Hand a written image to the post-processor, if there is one, without waiting for it.
+        :param high_res_source: The source URL of the image.
+        :param title: The title under which the image is stored.
+        """
+        if self.post_processor is None:
+            return
+        with self._post_processed:
+            self._num_post_processing += 1
+        future = self.post_processor.submit(os.path.join(self.download_folder, title))
+        future.add_done_callback(lambda done: self._finish_post_processing(high_res_source, title, done))
+
+    def _record_corrupt(self, high_res_source, title):
+        """
+        Record an image that is corrupt, so that the next run downloads it again.
+        """
+        self.metrics.add("pins_corrupt")
+        self.index.add(high_res_source, title, "err_corrupt")
+        with self._post_processed:
+            self.corrupt.append(high_res_source)
+
+    def _finish_post_processing(self, high_res_source, title, future):
+        """
+        Record the outcome of post-processing an image in the index. Images that turned out to be corrupt
+        are downloaded again by the next run.
+        """
+        try:
+            report = future.result()
+            self.metrics.observe("postprocess", report["seconds"])
+            if report["valid"]:
+                self.metrics.add("pins_postprocessed")
+            if report["valid"] and report["changed"]:
+                self.index.add(high_res_source, os.path.basename(report["path"]), "valid", num_bytes=report["bytes"],
+                               width=report["width"], height=report["height"])
+            elif not report["valid"]:
+                logger.warning(f"Deleted {title}, it is corrupt: {report['error']}")
+                if self.content_store is not None:
+                    # Otherwise the next run would link the corrupt image from the store again
+                    self.content_store.discard(high_res_source)
+                self._record_corrupt(high_res_source, title)
+        except Exception as e:
+            logger.error(f"Post-processing of {title} failed: {e}")
+        finally:
+            with self._post_processed:
+                self._num_post_processing -= 1
+                self._post_processed.notify_all()
 
 
 class PinterestDownloader(object):
 
     def __init__(self, page_timeout=10, num_threads=4,
-                 min_resolution="0x0", size_compare_mode=None):
+                 min_resolution="0x0", size_compare_mode=None, queue_size=256,
+                 engine="thread", per_host_limit=32, url_memory=None, extraction="script",
+                 scroll_timeout=None, scroll_min_wait=0.05, scroll_max_wait=1.0, content_store=None,
+                 checkpoint_interval=30, scraper="browser", metrics=None, retries=4, request_timeout=30,
+                 rate_limiter=None, post_processor=None, sync_streak=10):
         """
         Downloader for pinterest boards or tag pages.
-        This will open a selenium instance for scrolling.
+        This will open a selenium instance for scrolling, unless the pages are scraped without a browser.
 
+        :param page_timeout: Time in seconds to wait for new pins after scrolling, before the page is assumed
+               to be finished.
         :param num_threads: Number of threads to download images with at the same time.
+               With the async engine, this is the number of concurrent downloads instead.
         :param min_resolution: The minimal resolution an image must have to be downloaded and kept.
                Format: XxY.
         :param size_compare_mode: Wether to use an image's area or both sides as resolution guidelines.
                One of 'area' or 'individual'.
+        :param queue_size: Maximal number of found pins waiting to be downloaded before scrolling blocks.
+               Defaults to 256 pins.
+        :param engine: How images are downloaded. One of 'thread' (one blocking request per thread)
+               or 'async' (coroutines sharing keep-alive connections, requires aiohttp).
+        :param per_host_limit: Maximal number of connections to the same host. Only used by the async engine.
+        :param url_memory: Number of found pin urls to remember to recognize them when they appear again.
+               Defaults to remembering all of them, limit it to bound the memory on endless tag pages.
+        :param extraction: How image links are extracted from the page by the browser, see BrowserScraper.
+        :param scroll_timeout: Time in seconds to wait for new pins after scrolling. Defaults to the page_timeout.
+        :param scroll_min_wait: Shortest time in seconds to wait before checking for new pins after scrolling.
+        :param scroll_max_wait: Longest time in seconds to wait in between checks for new pins after scrolling.
+        :param content_store: A ContentStore to keep a single copy of every image in, shared by all boards.
+               Download folders then only contain hardlinks to the stored images.
+        :param checkpoint_interval: Time in seconds in between saving the state of the download to the download folder,
+               so that it can be resumed if it is interrupted.
+        :param scraper: How the pins of a page are found. One of 'browser' (scroll the page in a headless Firefox)
+               or 'resource' (page through the JSON feeds of pinterest without a browser). Pages that can not be
+               scraped without a browser fall back to the browser.
+        :param metrics: The Metrics to record the time spent in each stage of the download in. Pass the same Metrics
+               to several PinterestDownloaders to collect the statistics of all of them.
+        :param retries: Number of times a download that failed for a temporary reason, like a timeout or a
+               '503 Service Unavailable', is tried again with a growing delay. Downloads that still fail are tried
+               once more after the rest of the board. Requests for the pages of a feed are retried as often.
+        :param request_timeout: Time in seconds to wait for the connection to an image host, and for every read.
+        :param rate_limiter: A HostRateLimiter for the requests to every image host. Pass the same one to several
+               PinterestDownloaders to share the limits. By default, requests are not limited until a host answers
+               '429 Too Many Requests'.
+        :param post_processor: A PostProcessor to verify, convert or downscale the downloaded images and make
+               thumbnails of them in other processes, while the downloads continue. Can be shared by several
+               PinterestDownloaders.
+        :param sync_streak: Number of consecutive pins known from the last sync after which a sync stops scrolling.
         """
-        self.browser = None
         self.page_timeout = page_timeout
         self.num_threads = num_threads
+        self.queue_size = queue_size
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown download engine '{engine}', choose one of {ENGINES}.")
+        self.engine = engine
+        self.per_host_limit = per_host_limit
+        self.url_memory = url_memory
+        self.content_store = content_store
+        self.checkpoint_interval = checkpoint_interval
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.retries = retries
+        self.request_timeout = request_timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter()
+        self.post_processor = post_processor
+        self.sync_streak = sync_streak
         # Pick a minimal image resolution
         min_x, min_y = [int(r) for r in min_resolution.split("x")]
         self.size_verifier = _get_size_verifier(min_x, min_y, size_compare_mode)
-        self._webdriver = webdriver.Firefox
+
+        if scraper not in SCRAPERS:
+            raise ValueError(f"Unknown scraper '{scraper}', choose one of {SCRAPERS}.")
+        # The browser is only opened when it is used, so that scraping without it does not pay its startup
+        self.browser_scraper = BrowserScraper(page_timeout=page_timeout, extraction=extraction,
+                                              scroll_timeout=scroll_timeout, scroll_min_wait=scroll_min_wait,
+                                              scroll_max_wait=scroll_max_wait)
+        self.resource_scraper = None
+        if scraper == "resource":
+            self.resource_scraper = ResourceScraper(timeout=page_timeout, retries=retries)
+        self._browser_open = False
 
     def __enter__(self):
         """
-        Use this class with a with-statement as it needs to open a selenium instance.
+        Use this class with a with-statement as it may need to open a selenium instance.
         """
-        options = Options()
-        options.add_argument("--headless")
-        self.browser = self._webdriver(options=options)
+        if self.resource_scraper is None:
+            self._open_browser()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         """
         Close the selenium instance.
         """
-        self.browser.close()
-        if os.path.isfile("geckodriver.log"):
-            logger.debug("Removing geckodriver.log")
-            os.remove("geckodriver.log")
+        if self._browser_open:
+            self.browser_scraper.close()
+            self._browser_open = False
+
+    def _open_browser(self):
+        """
+        :returns the browser scraper, after opening its selenium instance if it is not open yet.
+        """
+        if not self._browser_open:
+            self.browser_scraper.open()
+            self._browser_open = True
+        return self.browser_scraper
+
+    def _load_board(self, board_url):
+        """
+        Load a page with the chosen scraper, or with the browser if the page can not be scraped without it.
+        :param board_url: The url of the pinterest page.
+        :returns the scraper that loaded the page, and the number of pins on the page.
+        """
+        with self.metrics.timer("page_load"):
+            if self.resource_scraper is not None:
+                try:
+                    return self.resource_scraper, self.resource_scraper.load(board_url)
+                except LOAD_ERRORS as e:
+                    logger.warning(f"Could not scrape {board_url} without a browser, using the browser instead: {e}")
+            scraper = self._open_browser()
+            return scraper, scraper.load(board_url)
 
     def download_board(self, board_url, download_folder,
                        board_name=None, num_pins=None,
-                       skip_tolerance=float('inf')):
+                       skip_tolerance=float('inf'), executor=None, resume=False, sync=False,
+                       on_result=None, sink=None, stop=None):
         """
         Download a specific pinterest page.
         :param board_url: The url to the pinterest board. Also works with tag pages.
@@ -268,84 +583,269 @@ class PinterestDownloader(object):
                so it is always tried to download num_pins new pins.
         :param skip_tolerance: Automatically stops the script if more than skip_tolerance pins have been skipped because
                they have already been downloaded (not because they do not meet the size constraint).
-        :returns None.
+        :param executor: An executor made by make_executor to share with the downloads of other boards.
+               If not given, the downloads of this board get their own threads.
+        :param resume: Continue from the checkpoint of an earlier, interrupted download of this board.
+               Pins discovered in that download are not processed again, except for the ones that were not downloaded.
+        :param sync: Only download the pins that were added to the board since the last sync, and stop scrolling as
+               soon as a streak of pins from the last sync is found. The pins of the board are kept in a manifest
+               in the download folder. The first sync of a board downloads all of it.
+        :param on_result: Callable that is called with the pin_result of every processed pin as soon as it is done,
+               from the download threads. Pins that are rejected by their size on the page are reported as 'err_size'
+               from the calling thread.
+        :param sink: Callable that takes the pin_result and the bytes of every downloaded image, instead of writing
+               the image into the download folder. The download folder then only keeps the index of the board.
+        :param stop: A threading.Event to stop the download from another thread. Downloads that already started
+               are completed, the rest of the board can be resumed later.
+        :returns a summary dict with the "board_url", "board_name", "download_folder", the number of pins "downloaded",
+                 "skipped", "filtered" by their known size before downloading them, "failed" even after retrying and
+                 discarded for being "corrupt", as well as the "bytes_saved" by aborting undersized pins.
         """
-        self.browser.get(board_url)
-        body = self.update_body_html()
+        scraper, num_available_pins = self._load_board(board_url)
         board_name, num_pins, download_folder = retrieve_bord_info(board_name=board_name,
                                                                    download_folder=download_folder,
                                                                    board_url=board_url,
                                                                    num_pins=num_pins,
-                                                                   body=body)
+                                                                   num_available_pins=num_available_pins)
         logger.info(f"Found board '{board_name}' with {num_pins} pins")
 
-        num_skipped = 0
-        downloaded_this_time = 0
-        url_cache = MemorySet()
-        downloader = Downloader(download_folder, self.size_verifier)
-
-        # Extract sources of images and download the found ones in parallel
-        with concurrent.futures.ThreadPoolExecutor(self.num_threads) as consumers:
-            logger.info("Starting download...")
-
-            while downloaded_this_time < num_pins and num_skipped < skip_tolerance:
+        url_cache = MemorySet(max_size=self.url_memory)
+        num_filtered = 0
+        checkpoint = Checkpoint(download_folder, board_url, interval=self.checkpoint_interval)
+        state = checkpoint.load() if resume else None
+        if state is not None:
+            # Pages that can be continued are not loaded again up to where the last download stopped
+            scraper.restore(state.get("position"))
+        manifest = Manifest(download_folder, board_url, streak=self.sync_streak) if sync else None
+        if manifest is not None:
+            manifest.load()
+        num_srcs = 0
+
+        if sink is not None:
+            sink_report = sink
+
+            def sink(high_res_source, download_report, data):
+                sink_report(pin_result(high_res_source, download_report), data)
+        listener = None
+        if on_result is not None:
+            def listener(high_res_source, download_report):
+                on_result(pin_result(high_res_source, download_report))
+
+        downloader = Downloader(download_folder, self.size_verifier, content_store=self.content_store,
+                                metrics=self.metrics, rate_limiter=self.rate_limiter, retries=self.retries,
+                                timeout=self.request_timeout, post_processor=self.post_processor, sink=sink)
+        pipeline = self._make_pipeline(downloader, num_pins, skip_tolerance, executor=executor, listener=listener)
+
+        def report_too_small(pins, too_small):
+            sizes = {pin["url"]: (pin["width"], pin["height"]) for pin in pins}
+            for high_res_link in too_small:
+                width, height = sizes[high_res_link]
+                listener(high_res_link, {"downloaded": False, "reason": "err_size", "width": width, "height": height})
+
+        def cancel_if_stopped():
+            """
+            :returns True, if the pipeline is done. A stopped pipeline is cancelled, so that submit puts
+                     the url it was given into the frontier instead of downloading it.
+            """
+            if stop is not None and stop.is_set():
+                pipeline.cancel()
+            return pipeline.done
+
+        try:
+            # Find the sources of images in this thread, while the pipeline downloads the found ones
+            with downloader, pipeline:
+                logger.info("Starting download...")
+
+                if state is not None:
+                    # Pins discovered in the last run are not processed again, except for the ones not downloaded
+                    url_cache.mark_visited(state["discovered"])
+                    pipeline.num_downloaded, pipeline.num_skipped = state["downloaded"], state["skipped"]
+                    for i, high_res_link in enumerate(state["frontier"]):
+                        cancel_if_stopped()
+                        if not pipeline.submit(high_res_link):
+                            # They are visited already, so the rest of the old frontier would be lost otherwise
+                            pipeline.defer(state["frontier"][i + 1:])
+                            break
+
+                while not cancel_if_stopped():
+
+                    with self.metrics.timer("extraction"):
+                        pins, num_srcs = scraper.find_pins()
+                    if manifest is not None:
+                        # Pins of the last sync are not processed again
+                        pins = manifest.scan(pins)
+                    high_res_srcs, too_small = split_by_size(pins, self.size_verifier)
+                    # Pins that are known to be too small from the page are never downloaded
+                    too_small = [high_res_link for high_res_link in too_small if high_res_link not in url_cache]
+                    url_cache.mark_visited(too_small)
+                    if listener is not None:
+                        report_too_small(pins, too_small)
+                    num_filtered += len(too_small)
+                    self.metrics.add("pins_filtered", len(too_small))
+                    retrieved_new_urls = url_cache.update(high_res_srcs) or len(too_small) > 0
+                    # Known pins are scrolled past as long as the page grows, e.g. when resuming
+                    if not retrieved_new_urls and (scraper.exhausted or num_srcs >= num_pins):
+                        logger.info(f"Stopped, no new pins found. Skipped {pipeline.num_skipped} pins.")
+                        break
 
-                high_res_srcs, new_num_srcs = find_high_res_links(body)
-                retrieved_new_urls = url_cache.update(high_res_srcs)
-                if not retrieved_new_urls:
-                    logger.info(f"Stopped, no new pins found. Skipped {num_skipped} pins.")
-                    break
+                    if pipeline.num_downloaded > 0:
+                        status = f"{pipeline.num_downloaded}/{num_pins} pins " \
+                                 f"({100 * pipeline.num_downloaded / num_pins:.1f}%)" if num_pins != float(
+                            "inf") else f"{pipeline.num_downloaded} pins"
+                        logger.info(f"Completed {status}.")
+
+                    for high_res_link in url_cache:
+                        # The url is taken from the cache already, submit keeps it in the frontier if stopped
+                        cancel_if_stopped()
+                        if not pipeline.submit(high_res_link):
+                            break
+                    checkpoint.maybe_save(url_cache, pipeline, position=scraper.position)
+                    if manifest is not None and manifest.reached_known:
+                        logger.info("Reached the pins of the last sync. Stopped.")
+                        break
 
-                if downloaded_this_time > 0:
-                    status = f"{downloaded_this_time / num_pins}%" if num_pins != float(
-                        "inf") else f"{downloaded_this_time} pins"
-                    logger.info(f"Completed {status}.")
+                    # Pinterest loads further images with JS, so the browser needs to scroll down to load more images
+                    if num_srcs < num_pins and not pipeline.done:
+                        logger.debug(f"Need to load more because {num_srcs} < {num_pins}")
+                        with self.metrics.timer("scroll"):
+                            scraper.load_more()
+        finally:
+            checkpoint.save(url_cache, pipeline, position=scraper.position)
+            if manifest is not None:
+                # Corrupt pins are downloaded again by the next sync
+                manifest.save(pipeline.frontier + url_cache.unvisited + downloader.corrupt,
+                              complete=scraper.complete or num_srcs >= num_available_pins)
+
+        if pipeline.num_present >= skip_tolerance:
+            logger.debug("Skip limit reached. Stopping.")
+        logger.info(
+            f"""Downloaded {pipeline.num_downloaded} pins to {download_folder}. Skipped {pipeline.num_skipped} pins. """
+            f"""Rejected {num_filtered} pins by their size without downloading them. """
+            f"""Failed to download {pipeline.num_failed} pins. Discarded {downloader.num_corrupt} corrupt pins. """
+            f"""Saved {pipeline.bytes_saved / 1e6:.1f} MB by aborting undersized pins. Finished.""")
+        if self.content_store is not None:
+            logger.info(self.content_store.report())
+        return {"board_url": board_url, "board_name": board_name, "download_folder": download_folder,
+                "downloaded": pipeline.num_downloaded, "skipped": pipeline.num_skipped,
+                "filtered": num_filtered, "failed": pipeline.num_failed, "corrupt": downloader.num_corrupt,
+                "bytes_saved": pipeline.bytes_saved}
+
+    def iter_pins(self, board_url, download_folder, sink=None, **kwargs):
+        """
+        Download a pinterest page and yield the result of every pin as soon as it is done, while the rest of the board
+        keeps downloading in the background. Closing the generator early stops the download after the running
+        downloads, and it can be resumed later like an interrupted download.
+        Pins that could not be downloaded even after retrying are yielded once, with the status 'err_failed', after
+        their retry at the end of the board failed too. Pins that are rejected by their size are yielded as 'err_size'.
 
-                future_to_url = {}
-                for high_res_link in url_cache:
+        :param board_url: The url to the pinterest board. Also works with tag pages.
+        :param download_folder: The folder to download the images to, see download_board.
+        :param sink: Callable that takes the pin_result and the bytes of every downloaded image, instead of writing
+               the image into the download folder. It is called from the download threads, before the pin is yielded.
+        :param kwargs: Further arguments of download_board.
+        :returns a generator of the pin_result of every processed pin. Its return value is the summary of
+                 download_board.
+        """
+        board = _BoardThread(self, board_url, download_folder, sink=sink, **kwargs)
+        try:
+            while True:
+                result = board.get()
+                if result is None:
+                    return board.summary()
+                yield result
+        finally:
+            board.close()
+
+    async def stream_board(self, board_url, download_folder, sink=None, **kwargs):
+        """
+        Async generator version of iter_pins, whose results are awaited without blocking the event loop.
+        The download runs in a background thread, the caller's event loop is only used to wait for the results.
+        :raises any error of download_board, once all results before it were yielded.
+        """
+        loop = asyncio.get_running_loop()
+        board = _BoardThread(self, board_url, download_folder, sink=sink, **kwargs)
+        try:
+            while True:
+                result = await loop.run_in_executor(None, board.get)
+                if result is None:
+                    board.summary()
+                    return
+                yield result
+        finally:
+            await loop.run_in_executor(None, board.close)
+
+    def make_executor(self):
+        """
+        :returns an executor of the chosen engine with num_threads concurrent downloads, that can be shared
+                 by several calls to download_board. Use it in a with-statement to shut it down.
+        """
+        if self.engine == "async":
+            return AsyncDownloadPipeline.make_executor(self.num_threads, self.per_host_limit,
+                                                       timeout=self.request_timeout)
+        return DownloadPipeline.make_executor(self.num_threads)
 
-                    future = consumers.submit(downloader,
-                                              high_res_source=high_res_link)
-                    future_to_url[future] = high_res_link
-                    if len(future_to_url) + downloaded_this_time == num_pins:
-                        break
+    def _make_pipeline(self, downloader, num_pins, skip_tolerance, executor=None, listener=None):
+        """
+        :returns the download pipeline of the chosen engine.
+        """
+        kwargs = dict(num_workers=self.num_threads, num_pins=num_pins, skip_tolerance=skip_tolerance,
+                      queue_size=self.queue_size, executor=executor, metrics=self.metrics, listener=listener)
+        if self.engine == "async":
+            return AsyncDownloadPipeline(downloader, per_host_limit=self.per_host_limit, timeout=self.request_timeout,
+                                         **kwargs)
+        return DownloadPipeline(downloader, **kwargs)
 
-                # Wait for the batch of images to complete
-                for fut in concurrent.futures.as_completed(future_to_url):
-                    url = future_to_url[fut]
-                    succesfully_downloaded = _handle_download_report(future=fut, url=url)
-                    num_skipped += not succesfully_downloaded
-                    downloaded_this_time += succesfully_downloaded
 
-                # Pinterest loads further images with JS, so selenium needs to scroll down to load more images
-                num_srcs = new_num_srcs
-                if num_srcs < num_pins:
-                    logger.debug(f"Need to scroll down because {num_srcs} < {num_pins}")
-                    body = self.scroll_down_for_new_body(times=7)
+class _BoardThread(object):
 
-        if num_skipped >= skip_tolerance:
-            logger.debug("Skip limit reached. Stopping.")
-        logger.info(
-            f"""Downloaded {downloaded_this_time} pins to {download_folder}. Skipped {num_skipped} pins. Finished.""")
+    def __init__(self, pinterest_downloader, board_url, download_folder, **kwargs):
+        """
+        Runs download_board in a background thread and hands the result of every pin over through a queue.
+        The queue is not bounded, so a slow consumer never stalls the downloads.
 
-    def update_body_html(self):
+        :param pinterest_downloader: The PinterestDownloader to download the board with.
+        :param board_url: The url to the pinterest board.
+        :param download_folder: The folder to download the images to.
+        :param kwargs: Further arguments of download_board.
+        """
+        self._results = queue.Queue()
+        self._stop = threading.Event()
+        self._summary = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(pinterest_downloader, board_url, download_folder),
+                                        kwargs=kwargs, name="pin-board", daemon=True)
+        self._thread.start()
+
+    def _run(self, pinterest_downloader, board_url, download_folder, **kwargs):
+        try:
+            self._summary = pinterest_downloader.download_board(board_url, download_folder,
+                                                                on_result=self._results.put, stop=self._stop,
+                                                                **kwargs)
+        except BaseException as e:
+            self._error = e
+        finally:
+            # Marks the end of the results
+            self._results.put(None)
+
+    def get(self):
         """
-        :returns the body of the current HTML page.
+        :returns the next pin_result, or None once the board is done.
         """
-        return self.browser.find_element_by_tag_name("body")
+        return self._results.get()
 
-    def scroll_down_for_new_body(self, times=5, sleep_time=0.5):
+    def summary(self):
         """
-        Scroll down a page in selenium. This is needed because pinterest loads content dynamically on scroll down.
+        :returns the summary of the board, once it is done.
+        :raises the error of download_board, if it failed.
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._summary
 
-        :param times: Number of times to scroll down in one go. Since the time it takes pinterest to load the content
-            can not be predicted, we need to scroll a few times to load more than a few new images.
-        :param sleep_time: Time in ms to sleep in between scrolls to let pinterest load and re-enable the scroll bar.
-            The scroll bar is disabled if we scrolled to the bottom and no new content has been loaded yet.
-        :returns the new HTML body of the document including the newly loaded pins.
+    def close(self):
+        """
+        Stop the download and wait for the downloads that already started.
         """
-        scroll_js = "var height = document.body.scrollHeight; window.scrollTo(0, height);"
-        for _ in range(times):
-            self.browser.execute_script(scroll_js)
-            sleep(sleep_time)
-        return self.update_body_html()
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,297 @@
+import concurrent.futures
+import logging
+import threading
+from time import perf_counter
+
+from pinterestDL.metrics import Metrics
+from pinterestDL.retry import DownloadError
+
+logger = logging.getLogger(__name__)
+
+
+def _handle_download_report(download_report, url):
+    """
+    Handles the result of downloading an image.
+    :param download_report: The status report returned by the Downloader.
+    :param url: The url where the image was downloaded from.
+
+    :return True, if the image was downloaded. False, if the image was skipped, discarded, or not found.
+    """
+    downloaded = True
+    if not download_report["downloaded"]:
+        reason = download_report["reason"]
+        downloaded = False
+        logger.debug(f"Could not download {url}: {reason}")
+
+    return downloaded
+
+
+class DownloadPipeline(object):
+
+    def __init__(self, downloader, num_workers=4, num_pins=float("inf"),
+                 skip_tolerance=float("inf"), queue_size=256, executor=None, metrics=None, listener=None):
+        """
+        Producer/consumer pipeline between the page scraper and the image downloads.
+        The scraper submits urls as soon as it finds them, while the threads of an executor
+        keep downloading them. The queue is bounded, so a scraper that is faster than the network
+        blocks in submit until the workers caught up.
+        The executor can be shared by several pipelines to download several boards with a global limit of threads.
+        Urls whose download failed even after its retries are put into a failure queue, and are tried once more
+        when all other urls have been processed. Only other, unexpected errors stop the pipeline.
+
+        :param downloader: Callable that takes a url and returns a status report dict.
+        :param num_workers: Number of images to download at the same time. Ignored if an executor is given.
+        :param num_pins: Number of successful downloads after which the pipeline is done.
+        :param skip_tolerance: Number of pins skipped for being downloaded already, after which the pipeline is done.
+        :param queue_size: Maximal number of urls waiting for a worker. Should hold at least the pins found by
+               one round of scrolling, so the workers do not run dry while the scraper scrolls.
+        :param executor: A ThreadPoolExecutor to download with. If not given, the pipeline creates and owns one.
+        :param metrics: The Metrics to record the time urls wait in submit and in the queue, and the pins counts in.
+        :param listener: Callable that is called with the url and the status report of every processed url, as soon
+               as it is processed. Urls that could not be downloaded even after retrying are reported once, with the
+               reason 'err_failed'. Called from the worker threads, or from the thread that closes the pipeline
+               for the failed urls.
+        """
+        self.downloader = downloader
+        self.num_workers = num_workers
+        self.num_pins = num_pins
+        self.skip_tolerance = skip_tolerance
+        self.max_pending = queue_size + num_workers
+        self.num_downloaded = 0
+        self.num_skipped = 0
+        # Skipped pins that were downloaded already, as opposed to pins rejected for their size
+        self.num_present = 0
+        self.num_failed = 0
+        self.bytes_saved = 0
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.listener = listener
+        # Urls that were submitted and not finished yet, with the time they were submitted at
+        self._in_flight = {}
+        self._unfinished = []
+        # Urls whose download failed after all retries, to try again at the end
+        self._failed = []
+        self._retrying_failed = False
+        self._cancelled = False
+        self._changed = threading.Condition()
+        self._error = None
+        self._owns_executor = executor is None
+        self._executor = executor
+
+    def __enter__(self):
+        """
+        Start the download workers, unless a shared executor was given.
+        """
+        if self._owns_executor:
+            self._executor = self.make_executor(self.num_workers)
+        return self
+
+    @staticmethod
+    def make_executor(num_workers):
+        """
+        :returns an executor that can be shared by several pipelines of this type.
+        """
+        return concurrent.futures.ThreadPoolExecutor(num_workers, thread_name_prefix="pin-download")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Wait for all submitted downloads and stop the workers.
+        If the scraper was interrupted by an exception, urls that are still queued are not downloaded anymore.
+        """
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+
+    @property
+    def done(self):
+        """
+        :returns True, if enough pins have been downloaded or skipped, or a download failed unexpectedly.
+        """
+        return (self._cancelled or self._error is not None or self.num_downloaded >= self.num_pins
+                or self.num_present >= self.skip_tolerance)
+
+    @property
+    def frontier(self):
+        """
+        :returns a list of the submitted urls that have not been downloaded, because they are still in flight,
+                 failed or because the pipeline was done before their turn.
+        """
+        with self._changed:
+            return list(self._in_flight) + self._unfinished + self._failed
+
+    def cancel(self):
+        """
+        Do not start any more downloads. Downloads that are already running are completed.
+        """
+        with self._changed:
+            self._cancelled = True
+            self._changed.notify_all()
+
+    def submit(self, url):
+        """
+        Hand a url to the download workers. Blocks while the queue is full, or while the downloads in flight
+        would already complete the requested number of pins.
+
+        :param url: The source URL of the image to download.
+        :returns True, if the url was queued. False, if the pipeline is done and the scraper should stop.
+                 The url is then part of the frontier.
+        """
+        start = perf_counter()
+        with self._changed:
+            while not self.done and (len(self._in_flight) >= self.max_pending
+                                     or self.num_downloaded + len(self._in_flight) >= self.num_pins):
+                self._changed.wait()
+            if self.done:
+                self._unfinished.append(url)
+                return False
+            submitted = self._in_flight[url] = perf_counter()
+        self.metrics.observe("submit_wait", submitted - start)
+        try:
+            self._dispatch(url)
+        except BaseException:
+            # The url would never be finished otherwise, and waiting for the pipeline would block forever
+            with self._changed:
+                self._in_flight.pop(url, None)
+                self._unfinished.append(url)
+                self._changed.notify_all()
+            raise
+        return True
+
+    def defer(self, urls):
+        """
+        Put urls into the frontier without downloading them, e.g. the rest of a batch after submit returned False.
+        :param urls: The urls that were not submitted.
+        """
+        with self._changed:
+            self._unfinished.extend(urls)
+
+    def wait(self):
+        """
+        Block until all submitted urls have been processed.
+        """
+        with self._changed:
+            while self._in_flight:
+                self._changed.wait()
+
+    def close(self):
+        """
+        Process the remaining urls and retry the failed ones, then stop and join the workers.
+        Re-raises the first unexpected error of a worker, if there was any.
+        """
+        self.wait()
+        self._retry_failed()
+        self._shutdown()
+        if self._error is not None:
+            raise self._error
+
+    def _retry_failed(self):
+        """
+        Try the urls in the failure queue once more, unless the pipeline is already done.
+        Urls that fail again stay in the frontier, so that a resumed download tries them again.
+        """
+        with self._changed:
+            failed, self._failed = self._failed, []
+        if failed and not self.done:
+            logger.info(f"Retrying {len(failed)} failed downloads.")
+            self._retrying_failed = True
+            for i, url in enumerate(failed):
+                if not self.submit(url):
+                    # The url itself was put into the frontier by submit
+                    self.defer(failed[i + 1:])
+                    break
+            self.wait()
+            with self._changed:
+                failed, self._failed = self._failed, []
+        if failed:
+            logger.warning(f"Could not download {len(failed)} pins, resume the download to try them again.")
+            self.metrics.add("pins_failed", len(failed))
+            with self._changed:
+                self.num_failed += len(failed)
+            self.defer(failed)
+            for url in failed:
+                self._notify(url, {"downloaded": False, "reason": "err_failed"})
+
+    def _dispatch(self, url):
+        """
+        Hand a url that has been accounted for to a worker.
+        """
+        self._executor.submit(self._download, url)
+
+    def _shutdown(self):
+        """
+        Stop the workers once no more urls are pending, unless the executor is shared.
+        """
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    def _finish(self, url, download_report=None, error=None):
+        """
+        Account for a processed url. Called exactly once for every url that was dispatched.
+
+        :param url: The url that was processed.
+        :param download_report: The status report of the download, or None if it was not attempted.
+        :param error: The exception raised by the download, if any.
+        """
+        with self._changed:
+            self._in_flight.pop(url, None)
+            if isinstance(error, DownloadError):
+                logger.warning(f"{error}." if self._retrying_failed else f"{error}. Trying again at the end.")
+                self._failed.append(url)
+            elif error is not None:
+                logger.error(f"Download of {url} failed: {error}")
+                self._unfinished.append(url)
+                self.metrics.add("pins_failed")
+                if self._error is None:
+                    self._error = error
+            elif download_report is not None:
+                downloaded = _handle_download_report(download_report, url=url)
+                self.num_downloaded += downloaded
+                self.num_skipped += not downloaded
+                self.num_present += download_report["reason"] == "err_present"
+                self.bytes_saved += download_report.get("bytes_saved", 0)
+                self.metrics.add("pins_downloaded" if downloaded else "pins_skipped")
+                self.metrics.add("bytes_saved", download_report.get("bytes_saved", 0))
+            else:
+                self._unfinished.append(url)
+            self._changed.notify_all()
+
+    def _notify(self, url, download_report):
+        """
+        Call the listener with the status report of a processed url. An error of the listener stops the pipeline
+        like an unexpected error of a download, and the url is still accounted for.
+        """
+        if self.listener is None:
+            return
+        try:
+            self.listener(url, download_report)
+        except Exception as e:
+            logger.error(f"Handling the result of {url} failed: {e}")
+            with self._changed:
+                if self._error is None:
+                    self._error = e
+                self._changed.notify_all()
+
+    def _observe_queue_wait(self, url):
+        """
+        Record how long a url waited for a worker since it was submitted.
+        """
+        submitted = self._in_flight.get(url)
+        if submitted is not None:
+            self.metrics.observe("queue_wait", perf_counter() - submitted)
+
+    def _download(self, url):
+        """
+        Download a single image in a worker thread and account for it in the pipeline.
+        """
+        # Drain urls that were queued before the pipeline finished without downloading them
+        if self.done:
+            self._finish(url)
+            return
+        self._observe_queue_wait(url)
+        try:
+            download_report = self.downloader(url)
+        except Exception as e:
+            self._finish(url, error=e)
+        else:
+            # Before the url is done, so that waiting for the pipeline also waits for the listener
+            self._notify(url, download_report)
+            self._finish(url, download_report=download_report)
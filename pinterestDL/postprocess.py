@@ -0,0 +1,129 @@
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+from time import perf_counter
+
+from PIL import Image
+
+from pinterestDL.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Formats images can be converted to, with the extension of the converted files
+FORMATS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp"}
+THUMBNAIL_FOLDER_NAME = "thumbnails"
+
+
+def _save(image, path, image_format):
+    """
+    Write an image as a new file, which breaks a hardlink to the content store, so the stored original is kept.
+    """
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    with atomic_write(path) as f:
+        image.save(f, format=image_format)
+
+
+def process_image(path, convert=None, max_size=None, thumbnail_size=None):
+    """
+    Post-process a downloaded image. Runs in a worker process of the PostProcessor.
+    The whole image is decoded first, to find truncated or corrupt files, which are deleted.
+    :param path: The path of the image.
+    :param convert: A format of FORMATS to convert the image to. The converted image replaces the original.
+    :param max_size: Downscale the image in place, if its longer side is longer than this many pixels.
+    :param thumbnail_size: Write a JPEG thumbnail whose longer side is this many pixels into the thumbnail folder
+           next to the image.
+    :returns a dict with the "path" of the processed image, wether it is "valid", the "error" if it is not, wether it
+             was "changed", its "width", "height" and "bytes", the path of its "thumbnail" and the "seconds" it took.
+    """
+    start = perf_counter()
+    report = {"path": path, "valid": True, "changed": False, "thumbnail": None}
+    try:
+        image = Image.open(path)
+        image.load()
+    except (OSError, SyntaxError, ValueError) as e:
+        # Pillow raises any of these for truncated or corrupt image data
+        os.remove(path)
+        report.update(valid=False, error=str(e), seconds=perf_counter() - start)
+        return report
+
+    with image:
+        # Converting or downscaling would only keep the first frame of an animation
+        animated = getattr(image, "is_animated", False)
+        processed = image
+        destination = path
+        if max_size is not None and max(image.size) > max_size and not animated:
+            processed = image.copy()
+            processed.thumbnail((max_size, max_size), Image.LANCZOS)
+        if convert is not None and not animated:
+            destination = os.path.splitext(path)[0] + FORMATS[convert]
+        if processed is not image or destination != path:
+            _save(processed, destination, convert.upper() if convert is not None else image.format)
+            if destination != path:
+                os.remove(path)
+            report["changed"] = True
+        if thumbnail_size is not None:
+            folder, name = os.path.split(path)
+            thumbnail_path = os.path.join(folder, THUMBNAIL_FOLDER_NAME, os.path.splitext(name)[0] + ".jpg")
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            thumbnail = processed.copy()
+            thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+            _save(thumbnail, thumbnail_path, "JPEG")
+            report["thumbnail"] = thumbnail_path
+        report.update(path=destination, width=processed.width, height=processed.height,
+                      bytes=os.path.getsize(destination), seconds=perf_counter() - start)
+    return report
+
+
+class PostProcessor(object):
+
+    def __init__(self, convert=None, max_size=None, thumbnail_size=None, num_processes=None):
+        """
+        Post-processing of downloaded images in a pool of processes, so that decoding and encoding them runs on all
+        cores instead of competing for the GIL with the downloads. The downloads only hand over the paths of the
+        images they wrote and continue without waiting.
+        Every image is fully decoded first, to find truncated or corrupt files, which are then deleted.
+        Use it in a with-statement to shut the processes down. One PostProcessor can be shared by all boards.
+        The processes are spawned, so a script that uses it must guard its main code with
+        'if __name__ == "__main__":'.
+
+        :param convert: A format of FORMATS to convert the images to, e.g. 'jpeg'.
+        :param max_size: Downscale images whose longer side is longer than this many pixels.
+        :param thumbnail_size: Write JPEG thumbnails whose longer side is this many pixels into a 'thumbnails' folder
+               inside the download folder.
+        :param num_processes: Number of images to process at the same time. Defaults to the number of cores.
+        """
+        if convert is not None:
+            Image.init()
+            if convert not in FORMATS or convert.upper() not in Image.SAVE:
+                raise ValueError(f"Can not convert images to '{convert}' with this installation of Pillow.")
+        self.convert = convert
+        self.max_size = max_size
+        self.thumbnail_size = thumbnail_size
+        self.num_processes = num_processes if num_processes is not None else os.cpu_count()
+        # The workers are started from download threads. Forking a process with running threads can copy a lock that
+        # another thread holds, which deadlocks the worker, so they are spawned instead
+        self._executor = concurrent.futures.ProcessPoolExecutor(self.num_processes,
+                                                                mp_context=multiprocessing.get_context("spawn"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, path):
+        """
+        Schedule the post-processing of an image.
+        :param path: The path of the image.
+        :returns a concurrent.futures.Future of the report of process_image.
+        """
+        return self._executor.submit(process_image, path, convert=self.convert, max_size=self.max_size,
+                                     thumbnail_size=self.thumbnail_size)
+
+    def shutdown(self):
+        """
+        Wait for the scheduled images and stop the processes.
+        """
+        self._executor.shutdown()
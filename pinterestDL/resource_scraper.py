@@ -0,0 +1,185 @@
+import http.client
+import itertools
+import json
+import logging
+from time import sleep
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from pinterestDL.retry import RETRY_STATUSES, backoff_delay, parse_retry_after
+from pinterestDL.scraper import Scraper, make_pin
+
+logger = logging.getLogger(__name__)
+
+# Bookmark of the last page of a feed
+END_BOOKMARK = "-end-"
+# Errors that mean a page can not be scraped without a browser, e.g. because pinterest changed its endpoints,
+# or that the feed still failed after retrying
+LOAD_ERRORS = (OSError, http.client.HTTPException, ValueError, KeyError, TypeError)
+
+_HEADERS = {"Accept": "application/json, text/javascript, */*; q=0.01",
+            "X-Requested-With": "XMLHttpRequest",
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0"}
+
+
+def parse_pin(item):
+    """
+    :param item: An entry of a feed returned by one of pinterest's resource endpoints.
+    :returns the pin record of the entry, with the dimensions of its original image.
+             None, if the entry is not a pin with an image, e.g. an ad or a story.
+    """
+    if not isinstance(item, dict) or item.get("type", "pin") != "pin":
+        return None
+    variants = [{"url": image["url"], "width": image.get("width"), "height": image.get("height")}
+                for image in (item.get("images") or {}).values() if isinstance(image, dict) and "url" in image]
+    if not variants:
+        return None
+    return make_pin(variants, pin_id=item.get("id"))
+
+
+def parse_board_url(board_url):
+    """
+    :param board_url: The url of a pinterest board or search page.
+    :returns the root url of the site, the path of the page, and the username and slug of a board or the query
+             of a search page. The ones that do not apply are None.
+    """
+    parts = urllib.parse.urlsplit(board_url)
+    root = f"{parts.scheme}://{parts.netloc}"
+    segments = [segment for segment in parts.path.split("/") if segment]
+    query = urllib.parse.parse_qs(parts.query).get("q")
+    if segments[:1] == ["search"] and query:
+        return root, parts.path, None, None, query[0]
+    if len(segments) == 2:
+        return root, parts.path, segments[0], segments[1], None
+    raise ValueError(f"Only boards and search pages can be scraped without a browser, not {board_url}.")
+
+
+class ResourceScraper(Scraper):
+
+    def __init__(self, timeout=10, page_size=25, retries=4):
+        """
+        Scrapes pinterest pages without a browser, by paging through the JSON endpoints that the pinterest website
+        loads its feeds from. Each page of a feed ends with a bookmark, which is the cursor to request the next page.
+        Works for boards and search pages.
+        Requests that failed for a temporary reason are tried again with a growing delay. If a page of the feed
+        still fails, the feed is treated as exhausted, so that the pins found so far are still downloaded.
+
+        :param timeout: Time in seconds to wait for an answer to a request.
+        :param page_size: Number of pins to request per page.
+        :param retries: Number of times a request that failed for a temporary reason is tried again.
+        """
+        super(ResourceScraper, self).__init__()
+        self.timeout = timeout
+        self.page_size = page_size
+        self.retries = retries
+        self._feed = None
+        self._error = None
+        # Bookmark and number of pins after the pins returned by find_pins so far
+        self._position = (None, 0)
+        self._bookmark = None
+        self._pins = []
+        self._num_found = 0
+
+    @property
+    def exhausted(self):
+        return self._error is not None or self._bookmark in (None, END_BOOKMARK)
+
+    @property
+    def complete(self):
+        return self._error is None and self.exhausted
+
+    def load(self, board_url):
+        root, path, username, slug, query = parse_board_url(board_url)
+        if query is not None:
+            num_pins = float("inf")
+            self._feed = (root, path, "BaseSearchResource", {"query": query, "scope": "pins"})
+        else:
+            board = self._get(root, path, "BoardResource", {"username": username, "slug": slug})["data"]
+            num_pins = board["pin_count"]
+            self._feed = (root, path, "BoardFeedResource", {"board_id": board["id"]})
+
+        self._bookmark = None
+        self._error = None
+        self._pins = []
+        self._num_found = 0
+        self._position = (None, 0)
+        self._fetch_page()
+        logger.debug(f"Found the provided page to contain {num_pins} pins.")
+        return num_pins
+
+    def find_pins(self):
+        pins, self._pins = self._pins, []
+        self._position = (self._bookmark, self._num_found)
+        return pins, self._num_found
+
+    @property
+    def position(self):
+        bookmark, num_found = self._position
+        return {"bookmark": bookmark, "num_found": num_found}
+
+    def restore(self, position):
+        if position is None or position.get("bookmark") is None:
+            return
+        # The first page was loaded already, but the feed continues behind it
+        self._bookmark, self._num_found = position["bookmark"], position["num_found"]
+        self._position = (self._bookmark, self._num_found)
+        self._pins = []
+        logger.info(f"Continuing the feed after {self._num_found} pins.")
+        self.load_more()
+
+    def load_more(self):
+        if not self.exhausted:
+            try:
+                self._fetch_page()
+            except LOAD_ERRORS as e:
+                logger.warning(f"Could not load more pins after {self._num_found} pins, "
+                               f"downloading the ones found so far: {e}")
+                self._error = e
+
+    def _fetch_page(self):
+        """
+        Request the next page of the feed and remember the pins on it.
+        """
+        root, path, resource, options = self._feed
+        options = dict(options, page_size=self.page_size)
+        if self._bookmark is not None:
+            options["bookmarks"] = [self._bookmark]
+        response = self._get(root, path, resource, options)
+
+        items = response["data"]
+        if isinstance(items, dict):
+            # Search pages wrap their pins
+            items = items["results"]
+        pins = [pin for pin in (parse_pin(item) for item in items) if pin is not None]
+        self._pins.extend(pins)
+        self._num_found += len(pins)
+        self._bookmark = response.get("bookmark")
+        logger.debug(f"Fetched {len(pins)} pins from {resource}, {self._num_found} so far.")
+
+    def _get(self, root, path, resource, options):
+        """
+        :returns the "resource_response" of a request to a resource endpoint.
+        :raises the error of the last attempt, if the request still failed after all retries.
+        """
+        data = json.dumps({"options": options, "context": {}})
+        query = urllib.parse.urlencode({"source_url": path, "data": data})
+        request = urllib.request.Request(f"{root}/resource/{resource}/get/?{query}", headers=_HEADERS)
+        for attempt in itertools.count():
+            retry_after = None
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())["resource_response"]
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES or attempt >= self.retries:
+                    raise
+                error = e
+                retry_after = parse_retry_after(e.headers.get("Retry-After"))
+            except (OSError, http.client.HTTPException) as e:
+                # Also timeouts and connections that were refused, reset or died mid-response
+                if attempt >= self.retries:
+                    raise
+                error = e
+            delay = backoff_delay(attempt, retry_after=retry_after)
+            logger.debug(f"Request to {resource} failed: {error}. Trying again in {delay:.1f}s.")
+            sleep(delay)
@@ -0,0 +1,158 @@
+from collections import deque
+import email.utils
+import logging
+import random
+import threading
+from time import monotonic, time
+import urllib.parse
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that mean the request may succeed if it is tried again later
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class DownloadError(Exception):
+
+    def __init__(self, url, cause):
+        """
+        Raised when an image could not be downloaded, even after retrying.
+        :param url: The url of the image.
+        :param cause: The error of the last attempt.
+        """
+        super(DownloadError, self).__init__(f"Could not download {url}: {cause}")
+        self.url = url
+        self.cause = cause
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=30.0, retry_after=None):
+    """
+    :param attempt: The number of the attempt that failed, starting at 0.
+    :param base_delay: The longest delay after the first attempt in seconds. It doubles with every attempt.
+    :param max_delay: The longest delay in seconds.
+    :param retry_after: Seconds the server asked to wait before trying again, if it did.
+    :returns the seconds to wait before the next attempt. The delay is random up to the exponentially growing limit,
+             so that requests that failed at the same time are not all retried at the same time.
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def parse_retry_after(value):
+    """
+    :param value: The Retry-After header of a response, either seconds or a HTTP date. May be None.
+    :returns the seconds to wait, or None if the header is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket(object):
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = max(rate, 1.0) if rate != float("inf") else 0.0
+        self.updated = monotonic()
+        self.last_throttled = float("-inf")
+        # Times of the requests in the last second, to know the rate to back off from while it is not limited
+        self.recent = deque()
+
+
+class HostRateLimiter(object):
+
+    def __init__(self, rate=float("inf"), min_rate=1.0, recovery=1.0):
+        """
+        Token bucket rate limit of the requests per host, shared by all downloads.
+        When a host answers '429 Too Many Requests', its rate is halved and then slowly raised again
+        with every successful request, so the downloads settle just below the rate the host accepts.
+
+        :param rate: Maximal number of requests per second to a single host. Unlimited by default,
+               until a host throttles the downloads.
+        :param min_rate: The rate is never lowered below this number of requests per second.
+        :param recovery: Number of requests per second the rate of a throttled host grows by every second.
+        """
+        if min_rate <= 0:
+            raise ValueError(f"The minimal rate must be a positive number of requests per second, not {min_rate}.")
+        if rate < min_rate:
+            raise ValueError(f"The rate of {rate} requests per second is below the minimal rate of {min_rate}.")
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def rate(self, url):
+        """
+        :returns the current rate limit of the host of the url in requests per second.
+        """
+        with self._lock:
+            return self._bucket(urllib.parse.urlsplit(url).netloc).rate
+
+    def acquire(self, url):
+        """
+        Take a token of the host of the url for a request, if there is one.
+        Call it again after waiting until it returns 0. Tokens are not reserved in advance, so that waiting requests
+        follow the rate as soon as it is lowered.
+        :param url: The url to request.
+        :returns 0 if the request may be sent now, otherwise the seconds until the next token is available.
+        """
+        now = monotonic()
+        with self._lock:
+            bucket = self._bucket(urllib.parse.urlsplit(url).netloc)
+            if bucket.rate == float("inf"):
+                bucket.recent.append(now)
+                while bucket.recent[0] < now - 1:
+                    bucket.recent.popleft()
+                return 0.0
+            bucket.tokens = min(bucket.tokens + (now - bucket.updated) * bucket.rate, max(bucket.rate, 1.0))
+            bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / bucket.rate
+
+    def throttled(self, url, retry_after=None):
+        """
+        Back off after the host of the url answered '429 Too Many Requests'.
+        :param url: The url whose request was throttled.
+        :param retry_after: Seconds the host asked to wait, if it did.
+        """
+        now = monotonic()
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            # Requests that were sent at the old rate are throttled together, only back off once for them
+            if now - bucket.last_throttled < 1:
+                return
+            bucket.last_throttled = now
+            current = bucket.rate if bucket.rate != float("inf") else len(bucket.recent)
+            bucket.rate = max(current / 2, self.min_rate)
+            # Owe the tokens of the time the host asked to wait, so that no request is sent before it passed
+            bucket.tokens = -(retry_after or 0.0) * bucket.rate
+            bucket.updated = now
+        logger.warning(f"{host} is throttling the downloads, limiting them to {bucket.rate:.1f} requests per second.")
+
+    def succeeded(self, url):
+        """
+        Raise the rate of the host of the url a little after a successful request.
+        :param url: The url that was downloaded.
+        """
+        with self._lock:
+            bucket = self._bucket(urllib.parse.urlsplit(url).netloc)
+            if bucket.rate < self.max_rate:
+                bucket.rate = min(bucket.rate + self.recovery / bucket.rate, self.max_rate)
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(self.max_rate)
+        return self._buckets[host]
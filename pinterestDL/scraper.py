@@ -0,0 +1,143 @@
+from abc import ABC, abstractmethod
+import re
+
+# Resized variants of pinterest images are stored under a path segment with their width, e.g. /236x/ or /736x/
+_VARIANT_WIDTH = re.compile(r"/(\d+)x\d*/")
+
+
+def variant_size(url):
+    """
+    :param url: The url of a variant of a pinterest image.
+    :returns the size hint of the variant: infinity for the original image, the width of a resized variant like
+             '236x' or '736x', or 0 if the url has no size hint.
+    """
+    if "/originals/" in url:
+        return float("inf")
+    match = _VARIANT_WIDTH.search(url)
+    return int(match.group(1)) if match else 0
+
+
+def parse_srcset(srcset):
+    """
+    :param srcset: The srcset attribute of an img tag, e.g. 'a.jpg 1x, b.jpg 2x'. May be None.
+    :returns the list of urls in the srcset.
+    """
+    if not srcset:
+        return []
+    return [candidate.split()[0] for candidate in srcset.split(",") if candidate.strip()]
+
+
+def make_pin(variants, pin_id=None):
+    """
+    :param variants: List of dicts with the "url" of a variant of the image of a pin, and its "width" and "height",
+           which may be None if they are not known.
+    :param pin_id: The id of the pin, if known.
+    :returns a pin record, a dict with the "id" of the pin, the "url", "width" and "height" of its largest variant,
+             and the urls of all "variants".
+    """
+    largest = max(variants, key=lambda variant: (variant_size(variant["url"]), variant["width"] or 0))
+    return {"id": pin_id, "url": largest["url"], "width": largest["width"], "height": largest["height"],
+            "variants": list(dict.fromkeys(variant["url"] for variant in variants))}
+
+
+def split_by_size(pins, size_verifier):
+    """
+    Sort out the pins that are known to be too small from their dimensions, before anything is downloaded.
+    :param pins: List of pin records.
+    :param size_verifier: Filter function to discard image based on its size.
+    :returns the list of urls of the pins to download, and the list of urls of the pins that are too small.
+    """
+    accepted, rejected = [], []
+    for pin in pins:
+        if pin["width"] is not None and pin["height"] is not None and not size_verifier(pin["width"], pin["height"]):
+            rejected.append(pin["url"])
+        else:
+            accepted.append(pin["url"])
+    return accepted, rejected
+
+
+class Scraper(ABC):
+
+    def __init__(self):
+        """
+        Interface of the backends that find the pins of a pinterest page for PinterestDownloader.download_board.
+        A scraper loads a page, returns records of the pins it found so far and loads more pins on request,
+        until the page is exhausted. A pin record is a dict made by make_pin.
+        Backends must implement exhausted, load, find_pins and load_more.
+        Use it in a with-statement, so that its resources are released.
+        """
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """
+        Acquire what the scraper needs to load pages, e.g. start a browser.
+        """
+        pass
+
+    def close(self):
+        """
+        Release everything acquired by open.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def exhausted(self):
+        """
+        :returns True, if loading more does not find any further pins.
+        """
+        pass
+
+    @property
+    def complete(self):
+        """
+        :returns True, if all pins of the page were found, as opposed to loading more having failed.
+        """
+        return self.exhausted
+
+    @property
+    def position(self):
+        """
+        :returns the position in the page after the pins returned by find_pins so far, as a JSON serializable value
+                 for restore. None, if the scraper can only load a page from its beginning.
+        """
+        return None
+
+    def restore(self, position):
+        """
+        Continue a loaded page from a position of an earlier visit, without loading the pins before it again.
+        Scrapers that can only load a page from its beginning ignore it.
+        :param position: A value of position, or None to start from the beginning.
+        """
+        pass
+
+    @abstractmethod
+    def load(self, board_url):
+        """
+        Open a pinterest page and forget everything about the previously loaded page.
+        :param board_url: The url of the pinterest board or tag page.
+        :returns the number of pins on the page, or infinity if it is not known, e.g. on tag pages.
+        """
+        pass
+
+    @abstractmethod
+    def find_pins(self):
+        """
+        :returns a list of records of the pins found since the last call, which may also contain pins that were
+                 returned before, and the number of pins found on the page so far.
+        """
+        pass
+
+    @abstractmethod
+    def load_more(self):
+        """
+        Load further pins of the page, e.g. by scrolling down.
+        """
+        pass